@@ -3,11 +3,22 @@ Agent definitions for the NY Times AI Chatbot.
 """
 from typing import Dict, List, Optional, TypedDict, Annotated
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage, BaseMessage
+from langchain_core.messages import AIMessage, HumanMessage, BaseMessage
 from langgraph.graph import StateGraph, END
+import json
 import operator
 from nyt_api import NYTSearchTool, NYTArticle
 from config import settings
+from session import FOLLOW_UP_SUMMARY, is_follow_up
+from postprocess import render_report
+from cassettes import get_cassette
+from archive import get_article_store
+from prompts import (
+    build_analysis_messages,
+    build_fused_messages,
+    build_summary_messages,
+    usage_entry
+)
 
 
 # Define the state that will be passed between agents
@@ -21,14 +32,42 @@ class AgentState(TypedDict):
     final_output: Optional[str]
     messages: Annotated[List[BaseMessage], operator.add]
     next_agent: Optional[str]
+    session_context: Optional[str]
+    session_articles: Optional[List[Dict]]
+    trace: Optional[List[Dict]]
+    refresh_articles: Optional[bool]
+    prefetched_articles: Optional[List[Dict]]
 
 
 # Initialize LLM
-llm = ChatOpenAI(
-    model=settings.llm_model,
-    temperature=settings.llm_temperature,
-    api_key=settings.openai_api_key
-)
+_cassette = get_cassette()
+if _cassette is not None and _cassette.mode == "replay":
+    # Replayed runs never reach the API, so no client (or key) is needed
+    llm = _cassette.replay_chat_model(settings.llm_model)
+else:
+    llm = ChatOpenAI(
+        model=settings.llm_model,
+        temperature=settings.llm_temperature,
+        api_key=settings.openai_api_key,
+        timeout=settings.llm_timeout
+    )
+    
+    # Record LLM calls when a cassette is configured
+    if _cassette is not None:
+        llm = _cassette.wrap_chat_model(llm)
+
+
+def record_llm_usage(state: AgentState, node: str, response) -> None:
+    """Append an LLM call's token usage, including cached tokens, to the run trace."""
+    state["trace"] = (state.get("trace") or []) + [usage_entry(node, response)]
+
+
+def research_filters(query: str) -> Dict:
+    """Extract potential search filters from a query."""
+    filters = {}
+    if "space" in query.lower() or "exploration" in query.lower():
+        filters["news_desk"] = "Science"
+    return filters
 
 
 class ResearchAgent:
@@ -37,22 +76,35 @@ class ResearchAgent:
     def __init__(self):
         self.nyt_tool = NYTSearchTool()
         
+        # Local history from `python archive.py ingest`, if one has been built
+        self.archive_store = get_article_store()
+        
     def execute(self, state: AgentState) -> AgentState:
         """Search for relevant articles based on user query."""
         query = state["user_query"]
         
-        print(f"\n🔍 Research Agent: Searching for '{query}'...")
+        filters = research_filters(query)
         
-        # Extract potential filters from query
-        filters = {}
-        if "space" in query.lower() or "exploration" in query.lower():
-            filters["news_desk"] = "Science"
+        prefetched = state.get("prefetched_articles")
+        if prefetched is not None:
+            # Searched and deduplicated ahead of the graph by run_batch
+            articles = [NYTArticle.from_dict(article) for article in prefetched]
+        else:
+            print(f"\n🔍 Research Agent: Searching for '{query}'...")
             
-        # Search for articles
-        articles = self.nyt_tool.search_articles(
-            query=query,
-            filters=filters if filters else None
-        )
+            # Search for articles
+            articles = self.nyt_tool.search_articles(
+                query=query,
+                filters=filters or None,
+                refresh=bool(state.get("refresh_articles"))
+            )
+            state["trace"] = (state.get("trace") or []) + [
+                {"node": "research", "nyt_requests": self.nyt_tool.last_request_count}
+            ]
+        
+        if not articles and self.archive_store is not None:
+            print("📚 No live results, searching local archive...")
+            articles = self.archive_store.search(query, news_desk=filters.get("news_desk"))
         
         if not articles:
             state["research_results"] = "No articles found for this query."
@@ -86,30 +138,10 @@ class SummarizationAgent:
             state["next_agent"] = "critical_analyst"
             return state
         
-        system_prompt = """You are a factual summarization agent for a NY Times research assistant.
-Your job is to create a clear, objective summary of the key facts from the provided articles.
-
-Rules:
-- Focus on factual information only
-- Combine information from multiple articles coherently
-- Maintain journalistic objectivity
-- Highlight the most important developments
-- Keep the summary concise but comprehensive (2-3 paragraphs)
-- Do NOT add your own opinions or analysis"""
-
-        user_prompt = f"""User Query: {user_query}
-
-Articles Found:
-{research_results}
-
-Please create a factual summary of the key developments related to the user's query."""
-
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_prompt)
-        ]
+        messages = build_summary_messages(research_results, user_query)
         
         response = self.llm.invoke(messages)
+        record_llm_usage(state, "summarization", response)
         state["summary"] = response.content
         state["next_agent"] = "critical_analyst"
         
@@ -131,36 +163,10 @@ class CriticalAnalystAgent:
         summary = state.get("summary", "")
         research_results = state.get("research_results", "")
         
-        system_prompt = """You are a critical analyst agent with expertise in business strategy and market analysis.
-Your job is to provide insightful analysis that goes beyond the facts.
-
-Based on the user's query and the factual summary, you should:
-- Identify implicit questions or analytical needs in the user's query
-- Provide strategic insights and implications
-- Analyze trends, opportunities, or challenges
-- Offer expert commentary on the significance of the developments
-- Be thoughtful and nuanced in your analysis
-
-You have access to the original articles to inform your analysis."""
-
-        user_prompt = f"""User Query: {user_query}
-
-Factual Summary:
-{summary}
-
-Original Articles for Reference:
-{research_results}
-
-Please provide a thoughtful analysis that addresses any analytical aspects of the user's query. 
-Pay special attention to phrases like "explain the opportunity," "analyze the impact," or "what does this mean for..."
-"""
-
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_prompt)
-        ]
+        messages = build_analysis_messages(research_results, user_query, summary)
         
         response = self.llm.invoke(messages)
+        record_llm_usage(state, "critical_analyst", response)
         state["analysis"] = response.content
         state["next_agent"] = "supervisor_compile"
         
@@ -168,6 +174,76 @@ Pay special attention to phrases like "explain the opportunity," "analyze the im
         return state
 
 
+class FusedAnalysisAgent:
+    """Agent that writes the summary and the analysis in a single LLM call."""
+    
+    def __init__(self, summarization_agent=None, critical_analyst_agent=None):
+        self.llm = llm
+        # Two-call path used when the structured response cannot be parsed
+        self.summarization_agent = summarization_agent or SummarizationAgent()
+        self.critical_analyst_agent = critical_analyst_agent or CriticalAnalystAgent()
+        
+    def execute(self, state: AgentState) -> AgentState:
+        """Create the factual summary and critical analysis from one request."""
+        print("\n🧩 Fused Analysis Agent: Creating summary and analysis in one call...")
+        
+        research_results = state.get("research_results", "")
+        user_query = state["user_query"]
+        
+        if not research_results or research_results == "No articles found for this query.":
+            return self._fall_back(state)
+        
+        messages = build_fused_messages(research_results, user_query)
+        
+        response = self.llm.invoke(messages, response_format={"type": "json_object"})
+        record_llm_usage(state, "fused_analysis", response)
+        
+        try:
+            summary, analysis = parse_fused_response(response.content)
+        except ValueError as e:
+            print(f"⚠️  Fused response unusable ({e}), falling back to two calls")
+            return self._fall_back(state)
+        
+        state["summary"] = summary
+        state["analysis"] = analysis
+        state["next_agent"] = "supervisor_compile"
+        
+        print("✅ Summary and analysis created")
+        return state
+    
+    def _fall_back(self, state: AgentState) -> AgentState:
+        """Run the regular summarization and analysis agents in sequence."""
+        state = self.summarization_agent.execute(state)
+        return self.critical_analyst_agent.execute(state)
+
+
+def parse_fused_response(content: str):
+    """
+    Extract (summary, analysis) from a fused JSON response.
+    
+    Raises:
+        ValueError: If the content is not a JSON object with two non-empty
+            string fields "summary" and "analysis"
+    """
+    text = content.strip()
+    # Tolerate a Markdown code fence around the JSON
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("{"):]
+    
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("response is not a JSON object")
+    
+    fields = []
+    for key in ("summary", "analysis"):
+        value = data.get(key)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"missing or empty '{key}' field")
+        fields.append(value.strip())
+    return tuple(fields)
+
+
 class SupervisorAgent:
     """Agent that orchestrates the workflow and compiles final output."""
     
@@ -177,7 +253,20 @@ class SupervisorAgent:
         self.critical_analyst_agent = CriticalAnalystAgent()
         
     def plan(self, state: AgentState) -> AgentState:
-        """Initial planning - delegates to research agent."""
+        """
+        Initial planning - delegates to research agent, or straight to the
+        critical analyst when a follow-up can be answered from session context.
+        """
+        session_context = state.get("session_context")
+        
+        if session_context and is_follow_up(state["user_query"], session_context):
+            print("\n👔 Supervisor Agent: Follow-up detected, answering from session context...")
+            state["research_results"] = session_context
+            state["articles"] = state.get("session_articles") or []
+            state["summary"] = FOLLOW_UP_SUMMARY
+            state["next_agent"] = "critical_analyst"
+            return state
+        
         print("\n👔 Supervisor Agent: Delegating to Research Agent...")
         state["next_agent"] = "research"
         return state
@@ -190,37 +279,16 @@ class SupervisorAgent:
         analysis = state.get("analysis", "No analysis available.")
         articles = state.get("articles", [])
         
-        # Build structured output
-        output_sections = []
-        
-        output_sections.append("=" * 80)
-        output_sections.append("NY TIMES AI CHATBOT - RESEARCH REPORT")
-        output_sections.append("=" * 80)
-        
-        output_sections.append("\n📰 SECTION 1: FACTUAL SUMMARY")
-        output_sections.append("-" * 80)
-        output_sections.append(summary)
-        
-        output_sections.append("\n\n💡 SECTION 2: CRITICAL ANALYSIS")
-        output_sections.append("-" * 80)
-        output_sections.append(analysis)
-        
-        output_sections.append("\n\n🔗 SECTION 3: SOURCE ARTICLES")
-        output_sections.append("-" * 80)
-        if articles:
-            for i, article in enumerate(articles, 1):
-                output_sections.append(f"\n{i}. {article['headline']}")
-                output_sections.append(f"   Published: {article['pub_date']}")
-                output_sections.append(f"   Link: {article['web_url']}")
-        else:
-            output_sections.append("No source articles available.")
-            
-        output_sections.append("\n" + "=" * 80)
-        
-        final_output = "\n".join(output_sections)
+        final_output = render_report(summary, analysis, articles)
         state["final_output"] = final_output
         state["next_agent"] = None
         
+        # Only this turn's messages; the reducer appends them to the history
+        state["messages"] = [
+            HumanMessage(content=state["user_query"]),
+            AIMessage(content=analysis or "")
+        ]
+        
         print("✅ Final output compiled")
         return state
 
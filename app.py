@@ -4,6 +4,7 @@ Streamlit web interface for NY Times AI Chatbot.
 import streamlit as st
 from orchestrator import run_chatbot
 from config import settings
+from session import ChatSession
 import os
 
 
@@ -101,6 +102,10 @@ def main():
         st.info(f"Model: {settings.llm_model}")
         st.info(f"Max Articles: {settings.max_articles_to_fetch}")
     
+    # Conversation memory survives reruns until the user clears it
+    if "chat_session" not in st.session_state:
+        st.session_state.chat_session = ChatSession()
+    
     # Main content area
     col1, col2 = st.columns([3, 1])
     
@@ -108,7 +113,7 @@ def main():
         st.markdown("### 💬 Your Query")
         
     with col2:
-        if st.button("🔄 Clear", help="Clear all inputs"):
+        if st.button("🔄 Clear", help="Clear all inputs and conversation history"):
             st.session_state.clear()
             st.rerun()
     
@@ -138,7 +143,7 @@ def main():
         # Run the chatbot
         with st.spinner("🤖 Multi-agent system processing your query..."):
             try:
-                result = run_chatbot(user_query)
+                result = run_chatbot(user_query, session=st.session_state.chat_session)
                 st.session_state.result = result
                 st.session_state.query = user_query
             except Exception as e:
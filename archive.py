@@ -0,0 +1,473 @@
+"""
+Bulk historical ingest from the NY Times Archive API into a local SQLite store.
+
+The Archive API returns every article of a month in one large JSON document.
+Months are streamed and parsed one article at a time, written to SQLite in
+batches, and checkpointed so an interrupted ingest resumes where it stopped.
+
+Usage:
+    python archive.py ingest --from 2020-01 --to 2020-12
+    python archive.py ingest --from 2020-01 --to 2020-03 --source-dir ./dumps
+    python archive.py search "space exploration" --desk Science
+"""
+import argparse
+import codecs
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+from config import settings
+from nyt_api import NYTArticle
+
+
+# Characters read from the source per chunk while streaming
+CHUNK_SIZE = 1 << 16
+
+# Articles written per transaction (and per checkpoint)
+BATCH_SIZE = 500
+
+_DOCS_START = re.compile(r'"docs"\s*:\s*\[')
+
+ARTICLE_COLUMNS = (
+    "web_url",
+    "headline",
+    "abstract",
+    "lead_paragraph",
+    "snippet",
+    "pub_date",
+    "news_desk",
+    "section_name",
+)
+
+
+def iter_archive_docs(chunks: Iterable[str]) -> Iterator[Dict]:
+    """
+    Yield the entries of the "docs" array of an Archive API response.
+
+    Only the current chunk and the article being decoded are held in memory,
+    so month dumps of any size can be parsed.
+
+    Args:
+        chunks: The response text, in pieces of any size
+
+    Returns:
+        Iterator over raw article dicts
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ""
+    exhausted = False
+
+    def read_more() -> bool:
+        nonlocal buffer, exhausted
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            return False
+        buffer += chunk
+        return True
+
+    # Skip ahead to the opening bracket of the docs array
+    while True:
+        match = _DOCS_START.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        # Keep a tail in case the key is split across chunks
+        buffer = buffer[-32:]
+        if not read_more():
+            raise ValueError("Archive response has no 'docs' array")
+
+    pos = 0
+    while True:
+        # Skip separators between array entries
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer):
+                break
+            buffer, pos = "", 0
+            if not read_more():
+                break
+        if pos >= len(buffer):
+            raise ValueError("Archive response ended inside the 'docs' array")
+        if buffer[pos] == "]":
+            return
+
+        try:
+            doc, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Most likely the article continues in the next chunk
+            if exhausted or not read_more():
+                raise
+            continue
+
+        yield doc
+        buffer = buffer[end:]
+        pos = 0
+
+
+class ArchiveAPISource:
+    """Streams month dumps from the NY Times Archive API."""
+
+    def __init__(self, api_key: str = None, base_url: str = None, timeout: int = 120):
+        self.api_key = api_key or settings.nyt_api_key
+        self.base_url = base_url or settings.nyt_archive_base_url
+        self.timeout = timeout
+
+    def iter_chunks(self, year: int, month: int) -> Iterator[str]:
+        """Yield the month's JSON response as text chunks."""
+        url = f"{self.base_url}/{year}/{month}.json"
+        with requests.get(url, params={"api-key": self.api_key}, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            yield from codecs.iterdecode(response.iter_content(CHUNK_SIZE), "utf-8")
+
+
+class ArchiveFileSource:
+    """
+    Reads month dumps from local files, for tests and offline ingest.
+
+    Files are named YYYY-MM.json (optionally .json.gz) and contain the
+    Archive API response unchanged.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path_for(self, year: int, month: int) -> str:
+        """Locate the dump file for a month."""
+        base = os.path.join(self.directory, f"{year}-{month:02d}.json")
+        return base + ".gz" if os.path.exists(base + ".gz") else base
+
+    def iter_chunks(self, year: int, month: int) -> Iterator[str]:
+        """Yield the month's JSON file as text chunks."""
+        path = self.path_for(year, month)
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            yield from iter(lambda: f.read(CHUNK_SIZE), "")
+
+
+class ArticleStore:
+    """SQLite store of articles, indexed for date, desk and section queries."""
+
+    def __init__(self, path: str = None, read_only: bool = False):
+        """
+        Args:
+            path: Database file; defaults to settings.archive_db_path
+            read_only: Open an existing store for searching only, skipping
+                schema setup
+        """
+        self.path = path or settings.archive_db_path
+        self.read_only = read_only
+        if read_only:
+            # Shared by the batch runner's I/O threads; SQLite serializes access
+            self.conn = sqlite3.connect(
+                f"file:{os.path.abspath(self.path)}?mode=ro", uri=True, check_same_thread=False
+            )
+            self.has_fts = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'"
+            ).fetchone() is not None
+            return
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        """Create tables and indexes if they do not exist yet."""
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                web_url TEXT PRIMARY KEY,
+                headline TEXT,
+                abstract TEXT,
+                lead_paragraph TEXT,
+                snippet TEXT,
+                pub_date TEXT,
+                news_desk TEXT,
+                section_name TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_pub_date ON articles (pub_date);
+            CREATE INDEX IF NOT EXISTS idx_articles_news_desk ON articles (news_desk, pub_date);
+            CREATE INDEX IF NOT EXISTS idx_articles_section_name ON articles (section_name, pub_date);
+
+            CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+                year INTEGER NOT NULL,
+                month INTEGER NOT NULL,
+                docs_done INTEGER NOT NULL DEFAULT 0,
+                completed INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL,
+                PRIMARY KEY (year, month)
+            );
+        """)
+        try:
+            self.conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                    headline, abstract, lead_paragraph,
+                    content='articles', content_rowid='rowid'
+                )
+            """)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5; search falls back to LIKE
+            self.has_fts = False
+        self.conn.commit()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
+
+    def _insert(self, articles: Iterable[NYTArticle]) -> int:
+        """Insert articles not stored yet; returns how many were new."""
+        added = 0
+        for article in articles:
+            row = article.to_dict()
+            if not row["web_url"]:
+                continue
+            cursor = self.conn.execute(
+                f"INSERT OR IGNORE INTO articles ({', '.join(ARTICLE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in ARTICLE_COLUMNS)})",
+                [row[column] for column in ARTICLE_COLUMNS]
+            )
+            if cursor.rowcount:
+                added += 1
+                if self.has_fts:
+                    self.conn.execute(
+                        "INSERT INTO articles_fts (rowid, headline, abstract, lead_paragraph) "
+                        "VALUES (?, ?, ?, ?)",
+                        (cursor.lastrowid, row["headline"], row["abstract"], row["lead_paragraph"])
+                    )
+        return added
+
+    def get_checkpoint(self, year: int, month: int) -> Tuple[int, bool]:
+        """Return (docs already ingested, whether the month is complete)."""
+        row = self.conn.execute(
+            "SELECT docs_done, completed FROM ingest_checkpoints WHERE year = ? AND month = ?",
+            (year, month)
+        ).fetchone()
+        return (row[0], bool(row[1])) if row else (0, False)
+
+    def write_batch(self, year: int, month: int, articles: List[NYTArticle], docs_done: int, completed: bool = False) -> int:
+        """Store a batch of articles and advance the month's checkpoint atomically."""
+        with self.conn:
+            added = self._insert(articles)
+            self.conn.execute(
+                "INSERT INTO ingest_checkpoints (year, month, docs_done, completed, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (year, month) DO UPDATE SET "
+                "docs_done = excluded.docs_done, completed = excluded.completed, updated_at = excluded.updated_at",
+                (year, month, docs_done, int(completed), time.time())
+            )
+        return added
+
+    def count(self) -> int:
+        """Number of stored articles."""
+        return self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def search(
+        self,
+        query: str,
+        news_desk: Optional[str] = None,
+        section_name: Optional[str] = None,
+        begin_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        max_results: int = None
+    ) -> List[NYTArticle]:
+        """
+        Search stored articles.
+
+        Args:
+            query: Search terms; articles matching more of them rank higher
+            news_desk: Optional news desk filter, e.g. "Science"
+            section_name: Optional section filter
+            begin_date: Start date in YYYYMMDD format
+            end_date: End date in YYYYMMDD format
+            max_results: Maximum number of articles to return
+
+        Returns:
+            List of NYTArticle objects, most relevant first (most recent
+            first when full-text search is unavailable)
+        """
+        if max_results is None:
+            max_results = settings.max_articles_to_fetch
+
+        terms = re.findall(r"\w+", query.lower())
+        conditions, params = [], []
+
+        if news_desk:
+            conditions.append("a.news_desk = ?")
+            params.append(news_desk)
+        if section_name:
+            conditions.append("a.section_name = ?")
+            params.append(section_name)
+        if begin_date:
+            conditions.append("a.pub_date >= ?")
+            params.append(f"{begin_date[:4]}-{begin_date[4:6]}-{begin_date[6:8]}")
+        if end_date:
+            # Dates are stored as ISO timestamps, so compare up to the end of the day
+            conditions.append("a.pub_date < ?")
+            params.append(f"{end_date[:4]}-{end_date[4:6]}-{end_date[6:8]}T99")
+
+        if terms and self.has_fts:
+            sql = (
+                "SELECT a.* FROM articles_fts f JOIN articles a ON a.rowid = f.rowid "
+                "WHERE articles_fts MATCH ?"
+            )
+            params.insert(0, " OR ".join(f'"{term}"' for term in terms))
+            order = "ORDER BY f.rank"
+        else:
+            sql = "SELECT a.* FROM articles a WHERE 1 = 1"
+            if terms:
+                matches = ["a.headline LIKE ? OR a.abstract LIKE ? OR a.lead_paragraph LIKE ?"] * len(terms)
+                conditions.append(f"({' OR '.join(matches)})")
+                for term in terms:
+                    params.extend([f"%{term}%"] * 3)
+            order = "ORDER BY a.pub_date DESC"
+
+        for condition in conditions:
+            sql += f" AND {condition}"
+        sql += f" {order} LIMIT ?"
+        params.append(max_results)
+
+        cursor = self.conn.execute(sql, params)
+        columns = [description[0] for description in cursor.description]
+        return [NYTArticle.from_dict(dict(zip(columns, row))) for row in cursor.fetchall()]
+
+
+_article_store: Optional[ArticleStore] = None
+_store_lock = threading.Lock()
+
+
+def get_article_store() -> Optional[ArticleStore]:
+    """
+    Return the shared read-only archive store, or None if no archive has
+    been ingested yet.
+    """
+    global _article_store
+    with _store_lock:
+        if _article_store is None and os.path.exists(settings.archive_db_path):
+            _article_store = ArticleStore(settings.archive_db_path, read_only=True)
+    return _article_store
+
+
+class ArchiveIngestor:
+    """Pulls month dumps from a source into an ArticleStore, resumably."""
+
+    def __init__(self, store: ArticleStore, source=None, pause: float = 12.0):
+        """
+        Args:
+            store: Destination store
+            source: ArchiveAPISource (default) or ArchiveFileSource
+            pause: Seconds to wait between months, to respect API rate limits
+        """
+        self.store = store
+        self.source = source or ArchiveAPISource()
+        self.pause = pause
+
+    def ingest_month(self, year: int, month: int) -> int:
+        """
+        Ingest one month, resuming after the last checkpointed article.
+
+        Returns:
+            Number of new articles stored
+        """
+        docs_done, completed = self.store.get_checkpoint(year, month)
+        if completed:
+            print(f"⏭️  {year}-{month:02d} already ingested")
+            return 0
+
+        if docs_done:
+            print(f"↩️  Resuming {year}-{month:02d} after {docs_done} articles")
+        else:
+            print(f"📥 Ingesting {year}-{month:02d}...")
+
+        added = 0
+        position = 0
+        batch: List[NYTArticle] = []
+        for doc in iter_archive_docs(self.source.iter_chunks(year, month)):
+            position += 1
+            if position <= docs_done:
+                continue
+            batch.append(NYTArticle(doc))
+            if len(batch) >= BATCH_SIZE:
+                added += self.store.write_batch(year, month, batch, position)
+                batch = []
+
+        added += self.store.write_batch(year, month, batch, position, completed=True)
+        print(f"✅ {year}-{month:02d}: {position} articles read, {added} new")
+        return added
+
+    def ingest_range(self, start: str, end: str) -> int:
+        """
+        Ingest every month from start to end inclusive.
+
+        Args:
+            start: First month as YYYY-MM
+            end: Last month as YYYY-MM
+
+        Returns:
+            Number of new articles stored
+        """
+        total = 0
+        months = list(month_range(start, end))
+        for i, (year, month) in enumerate(months):
+            fetched = not self.store.get_checkpoint(year, month)[1]
+            total += self.ingest_month(year, month)
+            if fetched and self.pause and i < len(months) - 1:
+                time.sleep(self.pause)
+        return total
+
+
+def month_range(start: str, end: str) -> Iterator[Tuple[int, int]]:
+    """Yield (year, month) pairs from start to end inclusive (YYYY-MM)."""
+    year, month = (int(part) for part in start.split("-"))
+    end_year, end_month = (int(part) for part in end.split("-"))
+    while (year, month) <= (end_year, end_month):
+        yield year, month
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NY Times Archive API ingest")
+    parser.add_argument("--db", default=settings.archive_db_path, help="SQLite store path")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Ingest a range of months")
+    ingest.add_argument("--from", dest="start", required=True, help="First month (YYYY-MM)")
+    ingest.add_argument("--to", dest="end", required=True, help="Last month (YYYY-MM)")
+    ingest.add_argument("--source-dir", help="Read YYYY-MM.json dumps from this directory instead of the API")
+    ingest.add_argument("--pause", type=float, default=12.0, help="Seconds between API months")
+
+    search = commands.add_parser("search", help="Search the local store")
+    search.add_argument("query")
+    search.add_argument("--desk", help="News desk filter")
+    search.add_argument("--limit", type=int, default=10)
+
+    args = parser.parse_args()
+    store = ArticleStore(args.db)
+    try:
+        if args.command == "ingest":
+            source = ArchiveFileSource(args.source_dir) if args.source_dir else ArchiveAPISource()
+            pause = 0 if args.source_dir else args.pause
+            added = ArchiveIngestor(store, source, pause=pause).ingest_range(args.start, args.end)
+            print(f"\n📚 {added} new articles, {store.count()} in store")
+        else:
+            for article in store.search(args.query, news_desk=args.desk, max_results=args.limit):
+                print(f"\n{article.get_summary_text()}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark near-duplicate detection on synthetic article batches.
+
+Each batch mixes distinct stories with lightly edited copies (one word
+changed, a sentence appended, a "Live Updates:" prefix), the way syndicated
+and live-blog versions show up in search results. Besides timings, the
+benchmark reports precision and recall of the dropped articles, for SimHash
+alone and with the Jaccard check.
+
+Usage:
+    python benchmarks/bench_dedup.py [--docs 1000 5000] [--max-distance 6] [--min-jaccard 0.7]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dedup
+
+
+def synthetic_articles(count: int, duplicate_ratio: float = 0.3, seed: int = 7):
+    """
+    Build article dicts where a share are edited copies of earlier ones.
+
+    Returns:
+        The articles, and for each one its edit ("original", "prefix",
+        "append" or "swap")
+    """
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    articles = []
+    edits = []
+    for i in range(count):
+        if articles and rng.random() < duplicate_ratio:
+            original = rng.choice(articles)
+            edit = rng.choice(("prefix", "append", "swap"))
+            copy = dict(original)
+            if edit == "prefix":
+                copy["headline"] = "Live Updates: " + original["headline"]
+            elif edit == "append":
+                copy["lead_paragraph"] = original["lead_paragraph"] + " " + " ".join(rng.choices(vocabulary, k=12)) + "."
+            else:
+                words = original["lead_paragraph"].split()
+                words[rng.randrange(len(words))] = "changed"
+                copy["lead_paragraph"] = " ".join(words)
+            articles.append(copy)
+            edits.append(edit)
+        else:
+            articles.append({
+                "headline": " ".join(rng.choices(vocabulary, k=8)),
+                "abstract": " ".join(rng.choices(vocabulary, k=25)),
+                "lead_paragraph": " ".join(rng.choices(vocabulary, k=50)),
+            })
+            edits.append("original")
+    return articles, edits
+
+
+def accuracy(kept, edits):
+    """Precision and recall of the dropped articles, and recall per edit."""
+    dropped = set(range(len(edits))) - set(kept)
+    copies = {i for i, edit in enumerate(edits) if edit != "original"}
+    correct = dropped & copies
+    precision = len(correct) / len(dropped) if dropped else 1.0
+    recall = len(correct) / len(copies) if copies else 1.0
+    per_edit = {}
+    for edit in ("prefix", "append", "swap"):
+        of_kind = {i for i in copies if edits[i] == edit}
+        per_edit[edit] = len(of_kind & dropped) / len(of_kind) if of_kind else 1.0
+    return precision, recall, per_edit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--max-distance", type=int, default=6)
+    parser.add_argument("--min-jaccard", type=float, default=0.7)
+    args = parser.parse_args()
+
+    # A threshold above 1 disables the Jaccard check, leaving SimHash alone
+    methods = (("simhash", 1.01), ("+jaccard", args.min_jaccard))
+
+    print(f"numpy: {'yes' if dedup.HAS_NUMPY else 'no (pure Python fallback)'}\n")
+    print(
+        f"{'docs':>6}{'unique':>8}{'method':>10}{'kept':>7}{'precision':>11}{'recall':>8}"
+        f"{'prefix':>8}{'append':>8}{'swap':>7}{'fingerprint ms':>16}{'total ms':>10}"
+    )
+    for count in args.docs:
+        articles, edits = synthetic_articles(count)
+        texts = [dedup.article_text(article) for article in articles]
+        unique = edits.count("original")
+
+        start = time.perf_counter()
+        dedup.simhash_texts(texts)
+        fingerprint_ms = (time.perf_counter() - start) * 1000
+
+        for method, min_jaccard in methods:
+            start = time.perf_counter()
+            kept = dedup.unique_indices(texts, max_distance=args.max_distance, min_jaccard=min_jaccard)
+            total_ms = (time.perf_counter() - start) * 1000
+
+            precision, recall, per_edit = accuracy(kept, edits)
+            print(
+                f"{count:>6}{unique:>8}{method:>10}{len(kept):>7}{precision:>11.3f}{recall:>8.3f}"
+                f"{per_edit['prefix']:>8.3f}{per_edit['append']:>8.3f}{per_edit['swap']:>7.3f}"
+                f"{fingerprint_ms:>16.1f}{total_ms:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark orchestrator.run_batch across executor backends and worker counts.
+
+The real graph, near-duplicate removal and report rendering run unchanged;
+only the edges are stubbed. NY Times searches return canned pages in which
+some articles are lightly edited copies of others, and the chat model returns
+canned text, each after a short sleep that mimics network latency. No API
+keys or network access are needed.
+
+Usage:
+    python benchmarks/bench_executors.py [--queries 1000] [--io-latency 0.002]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The agents module validates keys at import; the stubs never use them.
+# Benchmark runs must not read or fill the result cache either.
+os.environ.setdefault("NYT_API_KEY", "benchmark")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["RESULT_CACHE"] = "false"
+
+from langchain_core.messages import AIMessage
+
+import agents
+import orchestrator
+from executors import create_executor
+from nyt_api import NYTSearchTool
+from orchestrator import run_batch
+
+
+WORDS = [f"word{i}" for i in range(3000)]
+
+
+class StubResponse:
+    """Article Search response with one page of canned docs, some near-duplicates."""
+
+    def __init__(self, query: str, page: int):
+        self.query = query
+        self.page = page
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        rng = random.Random(f"{self.query}/{self.page}")
+        docs = []
+        for i in range(10):
+            if docs and rng.random() < 0.3:
+                # A live-blog style update of an earlier article
+                doc = dict(rng.choice(docs))
+                doc["lead_paragraph"] += " " + " ".join(rng.choices(WORDS, k=8)) + "."
+                doc["web_url"] = f"https://www.nytimes.com/stub/{self.page}/{i}-update.html"
+            else:
+                doc = {
+                    "headline": {"main": f"{self.query}: report {self.page}-{i}"},
+                    "abstract": " ".join(rng.choices(WORDS, k=30)),
+                    "lead_paragraph": " ".join(rng.choices(WORDS, k=120)),
+                    "web_url": f"https://www.nytimes.com/stub/{self.page}/{i}.html",
+                    "pub_date": "2024-05-01T12:00:00+0000",
+                }
+            docs.append(doc)
+        return {"response": {"docs": docs}}
+
+
+class StubChatModel:
+    """Chat model stand-in that sleeps and returns fixed text."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def invoke(self, messages, **kwargs):
+        time.sleep(self.latency)
+        return AIMessage(content="Stub section text. " * 40)
+
+
+def install_stubs(io_latency: float) -> None:
+    """Point the agents at stub search and chat backends."""
+    agents.llm = StubChatModel(io_latency)
+
+    class StubSearchTool(NYTSearchTool):
+        def __init__(self):
+            super().__init__()
+            self.http_get = self._get
+
+        def _get(self, url, params=None, **kwargs):
+            time.sleep(io_latency)
+            return StubResponse(params["q"], params.get("page", 0))
+
+    agents.NYTSearchTool = StubSearchTool
+    orchestrator.NYTSearchTool = StubSearchTool
+
+
+def run_once(backend: str, workers: int, queries) -> float:
+    """Run the batch once and return elapsed seconds."""
+    start = time.perf_counter()
+    with create_executor(backend, io_workers=16, cpu_workers=workers) as executor:
+        with contextlib.redirect_stdout(io.StringIO()):
+            reports = run_batch(queries, executor=executor)
+    assert len(reports) == len(queries)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--io-latency", type=float, default=0.002)
+    args = parser.parse_args()
+
+    install_stubs(args.io_latency)
+    queries = [f"commercial space market {i}" for i in range(args.queries)]
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+
+    print(f"{args.queries} queries, {cores} cores, {args.io_latency * 1000:.1f} ms stub I/O latency\n")
+    print(f"{'backend':<10}{'workers':>8}{'seconds':>10}{'queries/s':>12}{'speedup':>10}")
+
+    baseline = run_once("thread", 1, queries)
+    print(f"{'thread':<10}{'-':>8}{baseline:>10.2f}{args.queries / baseline:>12.1f}{1.0:>10.2f}")
+
+    for workers in worker_counts:
+        elapsed = run_once("process", workers, queries)
+        print(
+            f"{'process':<10}{workers:>8}{elapsed:>10.2f}"
+            f"{args.queries / elapsed:>12.1f}{baseline / elapsed:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
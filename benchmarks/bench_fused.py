@@ -0,0 +1,124 @@
+"""
+Compare LLM tokens and wall time between the sequential and fused graph modes.
+
+The agents run unchanged against a stub chat model that counts prompt tokens
+(about four characters per token) and sleeps like a real model would: a fixed
+round-trip cost plus time per input and output token. No API keys or network
+access are needed.
+
+Usage:
+    python benchmarks/bench_fused.py [--runs 5] [--articles 3]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The agents module validates keys at import; the stub model never uses them
+os.environ.setdefault("NYT_API_KEY", "benchmark")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.messages import AIMessage
+
+import agents
+
+
+class StubChatModel:
+    """Chat model stand-in with token accounting and simulated latency."""
+
+    def __init__(self, round_trip: float, input_rate: float, output_rate: float, output_tokens: int):
+        self.round_trip = round_trip
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.output_tokens = output_tokens
+        self.calls = 0
+        self.input_tokens = 0
+        self.generated_tokens = 0
+
+    def invoke(self, messages, **kwargs):
+        prompt_tokens = sum(len(message.content) for message in messages) // 4
+        text = "word " * self.output_tokens
+        if kwargs.get("response_format"):
+            # One response carrying both sections
+            content = json.dumps({"summary": text, "analysis": text})
+            completion_tokens = self.output_tokens * 2
+        else:
+            content = text
+            completion_tokens = self.output_tokens
+
+        time.sleep(self.round_trip + prompt_tokens * self.input_rate + completion_tokens * self.output_rate)
+        self.calls += 1
+        self.input_tokens += prompt_tokens
+        self.generated_tokens += completion_tokens
+        return AIMessage(content=content)
+
+
+def stub_research_results(count: int) -> str:
+    """Formatted article block of the size the research agent produces."""
+    blocks = []
+    for i in range(1, count + 1):
+        blocks.append(f"\n--- Article {i} ---")
+        blocks.append(f"Title: Commercial launch providers race for orbit ({i})")
+        blocks.append("Published: 2024-05-01T12:00:00+0000")
+        blocks.append("Abstract: " + "Private companies expand launch capacity and satellite services. " * 12)
+        blocks.append(f"URL: https://www.nytimes.com/2024/05/01/science/launch-{i}.html")
+    return "\n".join(blocks)
+
+
+def run_mode(mode: str, model: StubChatModel, research_results: str):
+    """Run the post-research part of the graph once in the given mode."""
+    summarization = agents.SummarizationAgent()
+    analyst = agents.CriticalAnalystAgent()
+    summarization.llm = analyst.llm = model
+
+    state = {
+        "user_query": "What are the latest developments in space exploration, "
+                      "and explain the commercial market opportunity.",
+        "research_results": research_results,
+        "articles": [],
+    }
+    if mode == "fused":
+        fused = agents.FusedAnalysisAgent(summarization, analyst)
+        fused.llm = model
+        state = fused.execute(state)
+    else:
+        state = summarization.execute(state)
+        state = analyst.execute(state)
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--articles", type=int, default=3)
+    parser.add_argument("--round-trip", type=float, default=0.3, help="Seconds of fixed latency per call")
+    parser.add_argument("--input-rate", type=float, default=0.0002, help="Seconds per input token")
+    parser.add_argument("--output-rate", type=float, default=0.002, help="Seconds per output token")
+    parser.add_argument("--output-tokens", type=int, default=300, help="Tokens per generated section")
+    args = parser.parse_args()
+
+    research_results = stub_research_results(args.articles)
+    results = {}
+    for mode in ("sequential", "fused"):
+        model = StubChatModel(args.round_trip, args.input_rate, args.output_rate, args.output_tokens)
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            run_mode(mode, model, research_results)
+        elapsed = (time.perf_counter() - start) / args.runs
+        results[mode] = (model.calls / args.runs, model.input_tokens / args.runs,
+                         model.generated_tokens / args.runs, elapsed)
+
+    print(f"\n{'mode':<12}{'calls':>7}{'input tok':>11}{'output tok':>12}{'seconds':>10}")
+    for mode, (calls, input_tokens, output_tokens, elapsed) in results.items():
+        print(f"{mode:<12}{calls:>7.0f}{input_tokens:>11.0f}{output_tokens:>12.0f}{elapsed:>10.2f}")
+
+    sequential, fused = results["sequential"], results["fused"]
+    print(f"\nfused saves {1 - fused[1] / sequential[1]:.0%} of input tokens "
+          f"and {1 - fused[3] / sequential[3]:.0%} of wall time per query")
+
+
+if __name__ == "__main__":
+    main()
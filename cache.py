@@ -0,0 +1,220 @@
+"""
+Result cache and query log.
+
+ResultCache keeps NY Times search results and finished reports in SQLite with
+a time-to-live, remembering whether each entry was computed for a user or
+precomputed by the cache warmer. QueryLog appends every user query, with how
+it was served, to a JSON Lines file that the warmer reads to find hot topics.
+
+Both take an injectable clock so behaviour over time can be simulated.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+from config import settings
+
+
+# Who computed a cache entry
+ORIGIN_USER = "user"
+ORIGIN_WARMER = "warmer"
+
+# How a logged query was served
+OUTCOME_MISS = "miss"
+OUTCOME_HIT = "hit"
+OUTCOME_WARM_HIT = "warm_hit"
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase a query and collapse punctuation and whitespace."""
+    return " ".join(re.findall(r"\w+", query.lower()))
+
+
+class ResultCache:
+    """SQLite key/value cache with per-entry expiry and origin."""
+
+    def __init__(self, path: str = None, clock: Callable[[], float] = time.time):
+        self.path = path or settings.result_cache_path
+        self.clock = clock
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS result_cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    origin TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_result_cache_expires_at ON result_cache (expires_at)"
+            )
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Any, str]]:
+        """Return (value, origin) for a live entry, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value, origin FROM result_cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, self.clock())
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def expires_at(self, namespace: str, key: str) -> Optional[float]:
+        """Expiry time of an entry, or None if there is none."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT expires_at FROM result_cache WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, namespace: str, key: str, value: Any, ttl: float, origin: str = ORIGIN_USER) -> None:
+        """Store a JSON-serializable value for ttl seconds."""
+        now = self.clock()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO result_cache "
+                "(namespace, key, value, origin, created_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), origin, now, now + ttl)
+            )
+
+    def purge_expired(self) -> int:
+        """Delete expired entries; returns how many were removed."""
+        with self._lock, self.conn:
+            cursor = self.conn.execute("DELETE FROM result_cache WHERE expires_at <= ?", (self.clock(),))
+        return cursor.rowcount
+
+
+class QueryLog:
+    """
+    Append-only JSON Lines log of user queries.
+
+    The app appends while the warmer, a separate process, reads and compacts
+    the log, so every access takes an advisory lock on a sidecar ".lock" file
+    as well as a thread lock. Where fcntl is unavailable (Windows) only the
+    thread lock applies, and compaction is skipped so no appended line can be
+    lost; readers filter by time anyway.
+    """
+
+    def __init__(self, path: str = None, clock: Callable[[], float] = time.time):
+        self.path = path or settings.query_log_path
+        self.lock_path = self.path + ".lock"
+        self.clock = clock
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+    @contextmanager
+    def _locked(self, exclusive: bool = True):
+        """Hold the thread lock and, where supported, the cross-process file lock."""
+        with self._lock:
+            if not HAS_FCNTL:
+                yield
+                return
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def record(self, query: str, outcome: str) -> None:
+        """Log a query and how it was served."""
+        entry = {
+            "ts": self.clock(),
+            "query": query,
+            "normalized": normalize_query(query),
+            "outcome": outcome,
+        }
+        with self._locked():
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def entries(self, since: float = 0.0) -> List[Dict]:
+        """Logged entries at or after a timestamp, oldest first."""
+        if not os.path.exists(self.path):
+            return []
+        result = []
+        with self._locked(exclusive=False):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if entry["ts"] >= since:
+                        result.append(entry)
+        return result
+
+    def compact(self, before: float) -> int:
+        """Drop entries older than a timestamp; returns how many were dropped."""
+        if not HAS_FCNTL or not os.path.exists(self.path):
+            return 0
+        # Writers block on the lock, so nothing is appended between the read
+        # and the replace
+        with self._locked():
+            with open(self.path, encoding="utf-8") as f:
+                lines = [line for line in f if line.strip()]
+            kept = [line for line in lines if json.loads(line)["ts"] >= before]
+            if len(kept) == len(lines):
+                return 0
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(kept)
+            os.replace(tmp_path, self.path)
+        return len(lines) - len(kept)
+
+
+_result_cache: Optional[ResultCache] = None
+_query_log: Optional[QueryLog] = None
+_init_lock = threading.Lock()
+
+
+def _caching_enabled() -> bool:
+    """Whether results may be cached and queries logged.
+
+    Cassette runs bypass both: a cached answer would skip the calls a
+    recording must capture, and a replay must not read or change state
+    left by live runs.
+    """
+    return settings.result_cache and not settings.cassette_mode
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Return the shared result cache, or None if caching is off."""
+    global _result_cache
+    if not _caching_enabled():
+        return None
+    with _init_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache()
+    return _result_cache
+
+
+def get_query_log() -> Optional[QueryLog]:
+    """Return the shared query log, or None if caching is off."""
+    global _query_log
+    if not _caching_enabled():
+        return None
+    with _init_lock:
+        if _query_log is None:
+            _query_log = QueryLog()
+    return _query_log
@@ -0,0 +1,249 @@
+"""
+Record/replay cassettes for NY Times HTTP calls and LLM calls.
+
+In record mode every request/response pair is captured, with its latency and
+token usage, into a compact JSON Lines file (gzip-compressed when the path
+ends in .gz). In replay mode the same requests are answered from the file,
+optionally sleeping for the original (or scaled) latency, so end-to-end runs
+are reproducible without network access.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import requests
+from langchain_core.messages import AIMessage
+
+from config import settings
+
+
+CASSETTE_MODES = ("record", "replay")
+
+# Request parameters that must never be written to a cassette
+SECRET_PARAMS = {"api-key", "api_key"}
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def _request_key(kind: str, payload: Dict) -> str:
+    """Stable key for a request, independent of dict ordering."""
+    raw = json.dumps({"kind": kind, **payload}, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _open(path: str, mode: str):
+    """Open a cassette file, compressed or not depending on its suffix."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class CassetteResponse:
+    """Minimal stand-in for requests.Response built from a recorded entry."""
+
+    def __init__(self, url: str, status_code: int, text: str):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error (replayed) for url: {self.url}",
+                response=self
+            )
+
+
+class Cassette:
+    """A file of recorded HTTP and LLM interactions."""
+
+    def __init__(self, path: str, mode: str = "replay", latency_scale: float = 1.0):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}'. Choose one of: {', '.join(CASSETTE_MODES)}")
+
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict]] = defaultdict(list)
+        self._served: Dict[str, int] = defaultdict(int)
+        self.stats = {
+            "recorded": 0,
+            "hits": 0,
+            "misses": 0,
+            "recorded_latency": 0.0,
+            "replayed_latency": 0.0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+        }
+
+        if mode == "record":
+            # Start from an empty file so stale interactions never linger
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with _open(path, "w"):
+                pass
+        else:
+            self._load()
+
+    def _load(self) -> None:
+        """Index recorded entries by request key, keeping their order."""
+        with _open(self.path, "r") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+
+    def _write(self, entry: Dict) -> None:
+        """Append one interaction to the cassette file."""
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            with _open(self.path, "a") as f:
+                f.write(line + "\n")
+            self.stats["recorded"] += 1
+            self.stats["recorded_latency"] += entry["latency"]
+
+    def _next_entry(self, key: str, description: str) -> Dict:
+        """
+        Return the next recorded entry for a key.
+
+        Repeated identical requests are served in recording order; once they
+        run out the last response is reused.
+        """
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.stats["misses"] += 1
+                raise CassetteMissError(f"No recorded interaction for {description} in {self.path}")
+            index = min(self._served[key], len(entries) - 1)
+            self._served[key] += 1
+            self.stats["hits"] += 1
+            return entries[index]
+
+    def _replay_latency(self, entry: Dict) -> None:
+        """Sleep for the recorded latency, scaled."""
+        delay = entry["latency"] * self.latency_scale
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            self.stats["replayed_latency"] += delay
+
+    def _count_tokens(self, usage: Optional[Dict]) -> None:
+        """Accumulate token usage for a recorded or replayed LLM call."""
+        if not usage:
+            return
+        with self._lock:
+            self.stats["input_tokens"] += usage.get("input_tokens", 0)
+            self.stats["output_tokens"] += usage.get("output_tokens", 0)
+
+    def http_get(self, url: str, params: Optional[Dict] = None, **kwargs):
+        """Drop-in replacement for requests.get."""
+        safe_params = {k: v for k, v in (params or {}).items() if k not in SECRET_PARAMS}
+        key = _request_key("http", {"url": url, "params": safe_params})
+
+        if self.mode == "replay":
+            entry = self._next_entry(key, f"GET {url} {safe_params}")
+            self._replay_latency(entry)
+            return CassetteResponse(url, entry["status_code"], entry["body"])
+
+        start = time.perf_counter()
+        response = requests.get(url, params=params, **kwargs)
+        latency = time.perf_counter() - start
+        self._write({
+            "kind": "http",
+            "key": key,
+            "request": {"url": url, "params": safe_params},
+            "status_code": response.status_code,
+            "body": response.text,
+            "latency": round(latency, 4),
+        })
+        return response
+
+    def wrap_chat_model(self, llm) -> "CassetteChatModel":
+        """Wrap a chat model so its invoke calls go through this cassette."""
+        return CassetteChatModel(llm, self)
+
+    def replay_chat_model(self, model: str) -> "CassetteChatModel":
+        """Chat model answering only from this cassette, with no real client behind it."""
+        if self.mode != "replay":
+            raise ValueError("A chat model without a client can only replay")
+        return CassetteChatModel(None, self, model=model)
+
+
+class CassetteChatModel:
+    """Chat model proxy that records or replays invoke calls."""
+
+    def __init__(self, llm, cassette: Cassette, model: Optional[str] = None):
+        self.llm = llm
+        self.cassette = cassette
+        # Part of every request key, so replay must use the recorded model name
+        self.model = model or getattr(llm, "model_name", None) or getattr(llm, "model", "")
+
+    def __getattr__(self, name):
+        if self.__dict__.get("llm") is None:
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def invoke(self, messages, **kwargs) -> AIMessage:
+        model = self.model
+        payload = {
+            "model": model,
+            "messages": [(message.type, message.content) for message in messages],
+            "kwargs": kwargs,
+        }
+        key = _request_key("llm", payload)
+        cassette = self.cassette
+
+        if cassette.mode == "replay":
+            entry = cassette._next_entry(key, f"LLM call to {model}")
+            cassette._replay_latency(entry)
+            usage = entry.get("usage_metadata")
+            cassette._count_tokens(usage)
+            return AIMessage(
+                content=entry["content"],
+                usage_metadata=usage,
+                response_metadata=entry.get("response_metadata", {}),
+            )
+
+        start = time.perf_counter()
+        response = self.llm.invoke(messages, **kwargs)
+        latency = time.perf_counter() - start
+        usage = getattr(response, "usage_metadata", None)
+        cassette._count_tokens(usage)
+        cassette._write({
+            "kind": "llm",
+            "key": key,
+            "request": {"model": model, "message_count": len(messages)},
+            "content": response.content,
+            "usage_metadata": dict(usage) if usage else None,
+            "response_metadata": {
+                k: v for k, v in response.response_metadata.items()
+                if k in ("token_usage", "model_name", "finish_reason")
+            },
+            "latency": round(latency, 4),
+        })
+        return response
+
+
+_active_cassette: Optional[Cassette] = None
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Return the cassette configured via CASSETTE_MODE, if any."""
+    global _active_cassette
+    if _active_cassette is None and settings.cassette_mode:
+        _active_cassette = Cassette(
+            settings.cassette_path,
+            mode=settings.cassette_mode,
+            latency_scale=settings.cassette_latency_scale
+        )
+    return _active_cassette
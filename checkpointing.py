@@ -0,0 +1,201 @@
+"""
+Durable graph checkpoints so failed or timed-out runs can resume.
+
+The compiled graph saves its state to SQLite after every node, keyed by a
+thread id. Within a chat session the id is derived from the query, so
+retrying the same question resumes at the failed node (for example a timed-out
+analysis call) with the earlier research and summary intact. Runs without a
+session get a fresh id, which ResumableRunError hands back for the retry.
+
+Checkpoints of finished runs are deleted straight away; those of abandoned
+runs are pruned by age and by total size so the database stays bounded.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    HAS_SQLITE_SAVER = True
+except ImportError:
+    HAS_SQLITE_SAVER = False
+
+from config import settings
+from cache import normalize_query
+
+
+def thread_id_for(user_query: str, scope: str = "") -> str:
+    """
+    Stable thread id for a query, so a retry finds the failed run.
+
+    Args:
+        user_query: The user's input query
+        scope: Separates otherwise identical queries, e.g. per conversation
+    """
+    raw = f"{scope}\n{normalize_query(user_query)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class ResumableRunError(RuntimeError):
+    """A checkpointed run failed; retrying on thread_id resumes it."""
+
+    def __init__(self, thread_id: str, error: BaseException):
+        super().__init__(f"{error} (resume with thread_id='{thread_id}')")
+        self.thread_id = thread_id
+        self.error = error
+
+
+class CheckpointStore:
+    """SQLite-backed LangGraph checkpointer with age and size pruning."""
+
+    def __init__(
+        self,
+        path: str = None,
+        max_age_seconds: float = None,
+        max_bytes: int = None,
+        prune_interval: float = 300.0
+    ):
+        if not HAS_SQLITE_SAVER:
+            raise ImportError(
+                "Durable checkpoints need langgraph-checkpoint-sqlite. "
+                "Install it with: pip install langgraph-checkpoint-sqlite"
+            )
+
+        self.path = path or settings.checkpoint_db_path
+        self.max_age_seconds = max_age_seconds or settings.checkpoint_max_age_hours * 3600
+        self.max_bytes = max_bytes or settings.checkpoint_max_mb * 1024 * 1024
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.saver = SqliteSaver(self.conn)
+        self.saver.setup()
+        # Share the checkpointer's lock so our statements never interleave with its own
+        self._lock = self.saver.lock
+
+        # The checkpointer's own tables carry no timestamps, so track runs here
+        with self._lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoint_runs (
+                    thread_id TEXT PRIMARY KEY,
+                    user_query TEXT,
+                    status TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_checkpoint_runs_updated_at ON checkpoint_runs (updated_at)"
+            )
+
+    def mark(self, thread_id: str, status: str, user_query: str = None) -> None:
+        """Record that a thread is running or has failed."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO checkpoint_runs (thread_id, user_query, status, updated_at) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (thread_id) DO UPDATE SET "
+                "status = excluded.status, updated_at = excluded.updated_at, "
+                "user_query = COALESCE(excluded.user_query, checkpoint_runs.user_query)",
+                (thread_id, user_query, status, time.time())
+            )
+
+    def finish(self, thread_id: str) -> None:
+        """Drop a completed thread; it never needs resuming."""
+        self._delete_threads([thread_id])
+
+    def _delete_threads(self, thread_ids) -> None:
+        """Delete checkpoints, pending writes and run records of threads."""
+        for thread_id in thread_ids:
+            self.saver.delete_thread(thread_id)
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM checkpoint_runs WHERE thread_id = ?",
+                [(thread_id,) for thread_id in thread_ids]
+            )
+
+    def size_bytes(self) -> int:
+        """Total size of stored checkpoint data."""
+        with self._lock:
+            checkpoints = self.conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints"
+            ).fetchone()[0]
+            writes = self.conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes"
+            ).fetchone()[0]
+        return checkpoints + writes
+
+    def prune(self, now: float = None) -> int:
+        """
+        Delete threads older than max_age_seconds, then the oldest remaining
+        failed threads until the store is within max_bytes.
+
+        Returns:
+            Number of threads deleted
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            expired = [row[0] for row in self.conn.execute(
+                "SELECT thread_id FROM checkpoint_runs WHERE updated_at < ?",
+                (now - self.max_age_seconds,)
+            )]
+            # Threads without a run record were left by an interrupted process
+            orphaned = [row[0] for row in self.conn.execute(
+                "SELECT DISTINCT thread_id FROM checkpoints "
+                "WHERE thread_id NOT IN (SELECT thread_id FROM checkpoint_runs)"
+            )]
+        stale = expired + orphaned
+        self._delete_threads(stale)
+
+        deleted = len(stale)
+        excess = self.size_bytes() - self.max_bytes
+        if excess > 0:
+            with self._lock:
+                sizes = self.conn.execute("""
+                    SELECT r.thread_id,
+                           (SELECT COALESCE(SUM(LENGTH(c.checkpoint) + LENGTH(c.metadata)), 0)
+                              FROM checkpoints c WHERE c.thread_id = r.thread_id)
+                         + (SELECT COALESCE(SUM(LENGTH(w.value)), 0)
+                              FROM writes w WHERE w.thread_id = r.thread_id)
+                    FROM checkpoint_runs r
+                    WHERE r.status != 'running'
+                    ORDER BY r.updated_at
+                """).fetchall()
+            oldest = []
+            for thread_id, size in sizes:
+                if excess <= 0:
+                    break
+                oldest.append(thread_id)
+                excess -= size
+            self._delete_threads(oldest)
+            deleted += len(oldest)
+
+        # Freed pages are reused by later checkpoints, so the file stops growing
+        self._last_prune = now
+        return deleted
+
+    def maybe_prune(self) -> None:
+        """Prune at most once per prune_interval."""
+        if time.time() - self._last_prune >= self.prune_interval:
+            deleted = self.prune()
+            if deleted:
+                print(f"🧹 Pruned {deleted} stale checkpoint threads")
+
+
+_checkpoint_store: Optional[CheckpointStore] = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    """Return the shared checkpoint store, or None if checkpoints are off."""
+    global _checkpoint_store
+    if not settings.checkpointing or not HAS_SQLITE_SAVER:
+        return None
+    with _store_lock:
+        if _checkpoint_store is None:
+            _checkpoint_store = CheckpointStore()
+    return _checkpoint_store
@@ -2,6 +2,7 @@
 Simple CLI interface for testing the NY Times AI Chatbot.
 """
 from orchestrator import run_chatbot
+from session import ChatSession
 import sys
 
 
@@ -10,9 +11,11 @@ def main():
     print("\n" + "=" * 80)
     print("NY TIMES AI CHATBOT - Command Line Interface")
     print("=" * 80)
-    print("\nType your query below (or 'quit' to exit)")
+    print("\nType your query below ('new' to start over, 'quit' to exit)")
     print("-" * 80)
     
+    session = ChatSession()
+    
     while True:
         try:
             user_query = input("\n📝 Your query: ").strip()
@@ -24,8 +27,13 @@ def main():
                 print("\n👋 Goodbye!\n")
                 break
             
+            if user_query.lower() in ['new', 'reset']:
+                session.reset()
+                print("\n🧹 Conversation cleared.")
+                continue
+            
             # Run the chatbot
-            result = run_chatbot(user_query)
+            result = run_chatbot(user_query, session=session)
             print("\n" + result + "\n")
             
         except KeyboardInterrupt:
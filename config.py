@@ -60,10 +60,66 @@ class Settings:
         
         # Constants
         self.nyt_api_base_url = "https://api.nytimes.com/svc/search/v2"
+        self.nyt_archive_base_url = "https://api.nytimes.com/svc/archive/v1"
+        
+        # Local article history built by `python archive.py ingest`
+        self.archive_db_path = os.getenv("ARCHIVE_DB_PATH", "data/nyt_archive.db")
         self.max_articles_to_fetch = 3
+        
+        # Near-duplicate filtering of search results
+        self.dedup_articles = True
+        self.dedup_max_distance = 6
+        self.dedup_min_jaccard = 0.7
+        self.max_search_pages = 2
+        
+        # Session memory limits
+        self.session_max_context_tokens = 1500
+        self.session_max_turns = 5
+        self.session_max_articles = 6
+        
+        # Cached search results and reports, and the query log they are warmed from
+        self.result_cache = os.getenv("RESULT_CACHE", "true").lower() in ("1", "true", "yes")
+        self.result_cache_path = os.getenv("RESULT_CACHE_PATH", "data/result_cache.db")
+        self.report_cache_ttl_hours = float(os.getenv("REPORT_CACHE_TTL_HOURS", "6"))
+        self.article_cache_ttl_hours = float(os.getenv("ARTICLE_CACHE_TTL_HOURS", "6"))
+        self.query_log_path = os.getenv("QUERY_LOG_PATH", "data/query_log.jsonl")
+        
+        # Cache warmer (python warmer.py)
+        self.warm_top_n = int(os.getenv("WARM_TOP_N", "20"))
+        self.warm_window_hours = float(os.getenv("WARM_WINDOW_HOURS", "24"))
+        self.warm_half_life_hours = float(os.getenv("WARM_HALF_LIFE_HOURS", "6"))
+        self.warm_off_peak_hours = os.getenv("WARM_OFF_PEAK_HOURS", "1-6")
+        self.warm_max_nyt_requests = int(os.getenv("WARM_MAX_NYT_REQUESTS", "50"))
+        self.warm_max_llm_tokens = int(os.getenv("WARM_MAX_LLM_TOKENS", "200000"))
+        
+        # Durable graph checkpoints for resuming failed runs
+        self.checkpointing = os.getenv("CHECKPOINTING", "true").lower() in ("1", "true", "yes")
+        self.checkpoint_db_path = os.getenv("CHECKPOINT_DB_PATH", "data/checkpoints.db")
+        self.checkpoint_max_age_hours = float(os.getenv("CHECKPOINT_MAX_AGE_HOURS", "24"))
+        self.checkpoint_max_mb = int(os.getenv("CHECKPOINT_MAX_MB", "200"))
+        
+        # Seconds before an LLM request is abandoned
+        self.llm_timeout = float(os.getenv("LLM_TIMEOUT", "60"))
+        
+        # Graph mode: "sequential" (summary and analysis calls) or "fused" (one call)
+        self.graph_mode = os.getenv("GRAPH_MODE", "sequential").lower()
+        
+        # Batch execution backend: "serial", "thread" or "process"
+        self.executor_backend = os.getenv("EXECUTOR_BACKEND", "thread")
+        self.executor_io_workers = int(os.getenv("EXECUTOR_IO_WORKERS", "8"))
+        self.executor_cpu_workers = int(os.getenv("EXECUTOR_CPU_WORKERS", "0")) or None
+        
+        # Record/replay cassettes: "" (off), "record" or "replay"
+        self.cassette_mode = os.getenv("CASSETTE_MODE", "").lower()
+        self.cassette_path = os.getenv("CASSETTE_PATH", "cassettes/default.jsonl.gz")
+        self.cassette_latency_scale = float(os.getenv("CASSETTE_LATENCY_SCALE", "1.0"))
     
     def validate_api_keys(self) -> None:
         """Validate that required API keys are present."""
+        # Replayed runs never reach the real APIs
+        if self.cassette_mode == "replay":
+            return
+        
         if not self.nyt_api_key:
             raise ValueError(
                 "NYT_API_KEY must be set. "
@@ -0,0 +1,319 @@
+"""
+Near-duplicate detection for NY Times articles.
+
+Live-blog updates, print and web edits of a story, and briefings that reuse a
+lead paragraph come back from search as separate results. Each article is
+reduced to a 64-bit SimHash over word shingles of its headline, abstract and
+lead paragraph; articles whose fingerprints differ in only a few bits are
+treated as the same story.
+
+SimHash is noisy on texts this short: an appended sentence or a swapped word
+can flip more bits than a safe threshold allows. Articles it lets through are
+also compared by Jaccard similarity of their shingle sets, with MinHash
+signatures and LSH bands picking out the candidate pairs.
+
+Fingerprints are computed with numpy when it is available, so thousands of
+articles can be processed per batch; a pure Python fallback is used otherwise.
+"""
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+# Words per shingle
+SHINGLE_SIZE = 3
+
+FINGERPRINT_BITS = 64
+
+# MinHash signature length and LSH layout; 8 bands of 4 rows make pairs with
+# Jaccard similarity 0.75 candidates 95% of the time
+MINHASH_PERMUTATIONS = 32
+MINHASH_BANDS = 8
+_MINHASH_PRIME = (1 << 31) - 1
+_MINHASH_SEEDS = random.Random(1729)
+_MINHASH_A = [_MINHASH_SEEDS.randrange(1, _MINHASH_PRIME) for _ in range(MINHASH_PERMUTATIONS)]
+_MINHASH_B = [_MINHASH_SEEDS.randrange(0, _MINHASH_PRIME) for _ in range(MINHASH_PERMUTATIONS)]
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_MASK = (1 << FINGERPRINT_BITS) - 1
+
+
+def article_text(article: Dict) -> str:
+    """Text used to fingerprint an article dict."""
+    headline = article.get("headline", "")
+    if isinstance(headline, dict):
+        headline = headline.get("main", "")
+    return " ".join(
+        part for part in (headline, article.get("abstract"), article.get("lead_paragraph")) if part
+    )
+
+
+def _token_hash(token: str) -> int:
+    """Stable 64-bit hash of a token."""
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _rotl(value: int, shift: int) -> int:
+    """Rotate a 64-bit integer left."""
+    return ((value << shift) | (value >> (FINGERPRINT_BITS - shift))) & _MASK
+
+
+def _tokenize_all(texts: Sequence[str]):
+    """
+    Map every text to token ids, hashing each distinct token once.
+
+    Returns the token ids of all texts as one flat list, the token count of
+    each text, and the hash of each token id.
+    """
+    vocabulary: Dict[str, int] = {}
+    token_hashes: List[int] = []
+    flat: List[int] = []
+    lengths: List[int] = []
+    for text in texts:
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        for token in tokens:
+            token_id = vocabulary.get(token)
+            if token_id is None:
+                token_id = vocabulary[token] = len(token_hashes)
+                token_hashes.append(_token_hash(token))
+            flat.append(token_id)
+        lengths.append(len(tokens))
+    return flat, lengths, token_hashes
+
+
+def _shingles_python(flat: List[int], lengths: List[int], token_hashes: List[int]) -> List[List[int]]:
+    """Shingle hashes of each document; short documents use single tokens."""
+    doc_shingles = []
+    start = 0
+    for length in lengths:
+        hashes = [token_hashes[i] for i in flat[start:start + length]]
+        start += length
+        if len(hashes) >= SHINGLE_SIZE:
+            doc_shingles.append([
+                hashes[i] ^ _rotl(hashes[i + 1], 21) ^ _rotl(hashes[i + 2], 42)
+                for i in range(len(hashes) - SHINGLE_SIZE + 1)
+            ])
+        else:
+            doc_shingles.append(hashes)
+    return doc_shingles
+
+
+def _simhash_python(doc_shingles: List[List[int]]) -> List[int]:
+    """Pure Python SimHash of each document's shingles."""
+    fingerprints = []
+    for shingles in doc_shingles:
+        counts = [0] * FINGERPRINT_BITS
+        for shingle in shingles:
+            for bit in range(FINGERPRINT_BITS):
+                counts[bit] += 1 if (shingle >> bit) & 1 else -1
+
+        fingerprint = 0
+        for bit, count in enumerate(counts):
+            if count > 0:
+                fingerprint |= 1 << bit
+        fingerprints.append(fingerprint)
+    return fingerprints
+
+
+def _minhash_python(doc_shingles: List[List[int]]) -> List[Tuple[int, ...]]:
+    """Pure Python MinHash signature of each document's shingle set."""
+    signatures = []
+    for shingles in doc_shingles:
+        values = [shingle % _MINHASH_PRIME for shingle in set(shingles)]
+        signatures.append(tuple(
+            min(((a * value + b) % _MINHASH_PRIME for value in values), default=_MINHASH_PRIME)
+            for a, b in zip(_MINHASH_A, _MINHASH_B)
+        ))
+    return signatures
+
+
+def _shingles_numpy(flat: List[int], lengths: List[int], token_hashes: List[int]):
+    """Shingle hashes of all documents, grouped by document."""
+    doc_count = len(lengths)
+    hash_table = np.array(token_hashes, dtype=np.uint64)
+    lengths = np.array(lengths, dtype=np.int64)
+    hashes = hash_table[np.array(flat, dtype=np.int64)] if flat else np.zeros(0, dtype=np.uint64)
+
+    def rotl(values, shift):
+        return (values << np.uint64(shift)) | (values >> np.uint64(FINGERPRINT_BITS - shift))
+
+    # Shingle every position of the concatenated token stream, then keep only
+    # the shingles that lie entirely inside one document
+    doc_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    doc_of_token = np.repeat(np.arange(doc_count), lengths)
+    if len(hashes) >= SHINGLE_SIZE:
+        shingles = hashes[:-2] ^ rotl(hashes[1:-1], 21) ^ rotl(hashes[2:], 42)
+        positions = np.arange(len(shingles))
+        valid = positions + SHINGLE_SIZE - 1 < (doc_starts + lengths)[doc_of_token[: len(shingles)]]
+        shingles, shingle_docs = shingles[valid], doc_of_token[: len(positions)][valid]
+    else:
+        shingles = np.zeros(0, dtype=np.uint64)
+        shingle_docs = np.zeros(0, dtype=np.int64)
+
+    # Documents too short for a full shingle fall back to single tokens
+    short = np.flatnonzero((lengths > 0) & (lengths < SHINGLE_SIZE))
+    if len(short):
+        short_mask = np.isin(doc_of_token, short)
+        shingles = np.concatenate((shingles, hashes[short_mask]))
+        shingle_docs = np.concatenate((shingle_docs, doc_of_token[short_mask]))
+
+    order = np.argsort(shingle_docs, kind="stable")
+    return shingles[order], shingle_docs[order]
+
+
+def _simhash_numpy(shingles, shingle_docs, doc_count: int) -> List[int]:
+    """Vectorized SimHash of grouped shingles."""
+    # A fingerprint bit is set when most of the document's shingles have it set.
+    # Bits are laid out one row per bit position so the per-document sums run
+    # over contiguous memory.
+    fingerprints = np.zeros(doc_count, dtype=np.uint64)
+    if len(shingles):
+        shingle_bytes = np.ascontiguousarray(shingles.astype("<u8").view(np.uint8).reshape(-1, 8).T)
+        bits = np.unpackbits(shingle_bytes, axis=0, bitorder="little")
+        present, starts, counts = np.unique(shingle_docs, return_index=True, return_counts=True)
+        ones = np.add.reduceat(bits, starts, axis=1, dtype=np.int32)
+        majority = ones * 2 > counts
+        packed = np.ascontiguousarray(np.packbits(majority, axis=0, bitorder="little").T)
+        fingerprints[present] = packed.view("<u8").ravel()
+    return [int(value) for value in fingerprints]
+
+
+def _minhash_numpy(shingles, shingle_docs, doc_count: int) -> List[Tuple[int, ...]]:
+    """Vectorized MinHash signatures of grouped shingles."""
+    signatures = np.full((doc_count, MINHASH_PERMUTATIONS), _MINHASH_PRIME, dtype=np.uint64)
+    if len(shingles):
+        # Values stay below 2**31, so a * value + b cannot overflow 64 bits
+        values = shingles % np.uint64(_MINHASH_PRIME)
+        present, starts = np.unique(shingle_docs, return_index=True)
+        for column, (a, b) in enumerate(zip(_MINHASH_A, _MINHASH_B)):
+            permuted = (values * np.uint64(a) + np.uint64(b)) % np.uint64(_MINHASH_PRIME)
+            signatures[present, column] = np.minimum.reduceat(permuted, starts)
+    return [tuple(int(value) for value in row) for row in signatures]
+
+
+def _fingerprint_all(texts: Sequence[str]):
+    """SimHash fingerprints, MinHash signatures and shingle sets of texts."""
+    flat, lengths, token_hashes = _tokenize_all(texts)
+    if HAS_NUMPY and lengths:
+        shingles, shingle_docs = _shingles_numpy(flat, lengths, token_hashes)
+        bounds = np.searchsorted(shingle_docs, np.arange(len(lengths) + 1))
+        shingle_sets = [
+            set(shingles[bounds[i]:bounds[i + 1]].tolist()) for i in range(len(lengths))
+        ]
+        return (
+            _simhash_numpy(shingles, shingle_docs, len(lengths)),
+            _minhash_numpy(shingles, shingle_docs, len(lengths)),
+            shingle_sets,
+        )
+    doc_shingles = _shingles_python(flat, lengths, token_hashes)
+    return _simhash_python(doc_shingles), _minhash_python(doc_shingles), [set(s) for s in doc_shingles]
+
+
+def jaccard(first: Set[int], second: Set[int]) -> float:
+    """Jaccard similarity of two shingle sets."""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def simhash_texts(texts: Sequence[str]) -> List[int]:
+    """Compute a 64-bit SimHash fingerprint for each text."""
+    flat, lengths, token_hashes = _tokenize_all(texts)
+    if not lengths:
+        return []
+    if HAS_NUMPY:
+        shingles, shingle_docs = _shingles_numpy(flat, lengths, token_hashes)
+        return _simhash_numpy(shingles, shingle_docs, len(lengths))
+    return _simhash_python(_shingles_python(flat, lengths, token_hashes))
+
+
+def unique_indices(texts: Sequence[str], max_distance: int = 4, min_jaccard: float = 0.7) -> List[int]:
+    """
+    Indices of texts to keep, dropping near-duplicates of earlier texts.
+
+    Order is preserved, so the first (most relevant) version of a story wins.
+    Candidate pairs are found by splitting SimHash fingerprints into
+    max_distance + 1 bands (two fingerprints within max_distance bits must
+    agree exactly on at least one band) and MinHash signatures into
+    MINHASH_BANDS bands, which avoids comparing every pair.
+
+    Args:
+        texts: Texts to compare, in priority order
+        max_distance: Largest SimHash Hamming distance still considered a duplicate
+        min_jaccard: Smallest shingle-set Jaccard similarity still considered a duplicate
+
+    Returns:
+        Sorted indices of the texts to keep
+    """
+    fingerprints, signatures, shingle_sets = _fingerprint_all(texts)
+    band_count = max_distance + 1
+    band_bits = FINGERPRINT_BITS // band_count
+    band_mask = (1 << band_bits) - 1
+    rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+
+    buckets: Dict[tuple, List[int]] = defaultdict(list)
+    kept: List[int] = []
+    for index, fingerprint in enumerate(fingerprints):
+        simhash_keys = [
+            ("simhash", band, (fingerprint >> (band * band_bits)) & band_mask) for band in range(band_count)
+        ]
+        minhash_keys = [
+            ("minhash", band, signatures[index][band * rows:(band + 1) * rows]) for band in range(MINHASH_BANDS)
+        ]
+
+        duplicate = False
+        seen = set()
+        for key in simhash_keys:
+            for other in buckets.get(key, ()):
+                if other in seen:
+                    continue
+                seen.add(other)
+                if (fingerprint ^ fingerprints[other]).bit_count() <= max_distance:
+                    duplicate = True
+                    break
+            if duplicate:
+                break
+
+        # Only MinHash candidates are worth the exact set comparison
+        if not duplicate:
+            compared = set()
+            for key in minhash_keys:
+                for other in buckets.get(key, ()):
+                    if other in compared:
+                        continue
+                    compared.add(other)
+                    if jaccard(shingle_sets[index], shingle_sets[other]) >= min_jaccard:
+                        duplicate = True
+                        break
+                if duplicate:
+                    break
+
+        if not duplicate:
+            kept.append(index)
+            for key in simhash_keys + minhash_keys:
+                buckets[key].append(index)
+    return kept
+
+
+def dedupe_articles(
+    articles: List[Dict],
+    max_distance: int = 4,
+    min_jaccard: float = 0.7,
+    limit: Optional[int] = None
+) -> List[Dict]:
+    """Drop near-duplicate article dicts, keeping the first of each story."""
+    kept = unique_indices(
+        [article_text(article) for article in articles],
+        max_distance=max_distance,
+        min_jaccard=min_jaccard
+    )
+    result = [articles[i] for i in kept]
+    return result[:limit] if limit is not None else result
@@ -0,0 +1,138 @@
+"""
+Execution backends for batch runs.
+
+I/O-bound stages (NY Times searches, LLM calls) run on threads, where the GIL
+is released while waiting on the network. CPU-bound stages (tokenization,
+scoring, hashing, report rendering) can be sent to a process pool so they do
+not compete with the I/O threads for the GIL.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+EXECUTOR_BACKENDS = ("serial", "thread", "process")
+
+
+def _start_method() -> str:
+    """Safest available way to start worker processes from a threaded parent."""
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class StageExecutor:
+    """Runs batch stages serially in the calling thread."""
+
+    name = "serial"
+
+    def map_io(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """Apply an I/O-bound function to every item, preserving order."""
+        return [fn(item) for item in items]
+
+    def map_cpu(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """Apply a CPU-bound function to every item, preserving order."""
+        return [fn(item) for item in items]
+
+    def shutdown(self) -> None:
+        """Release any worker pools."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+
+class ThreadStageExecutor(StageExecutor):
+    """Runs every stage on a shared thread pool."""
+
+    name = "thread"
+
+    def __init__(self, io_workers: int = 8):
+        self._io_pool = ThreadPoolExecutor(max_workers=io_workers)
+
+    def map_io(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        return list(self._io_pool.map(fn, items))
+
+    def map_cpu(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        return list(self._io_pool.map(fn, items))
+
+    def shutdown(self) -> None:
+        self._io_pool.shutdown(wait=True)
+
+
+class ProcessStageExecutor(ThreadStageExecutor):
+    """
+    Runs I/O stages on threads and CPU stages on a process pool.
+
+    CPU work is submitted in chunks so each round trip to a worker carries a
+    batch of items; callers should pass plain tuples rather than rich objects
+    to keep pickling cheap. The function must be defined at module level.
+
+    Workers are started by a fork server (or spawned where that is not
+    available) rather than forked, because the pool is first used while the
+    I/O threads are running and forking a multi-threaded process can deadlock.
+    """
+
+    name = "process"
+
+    def __init__(
+        self,
+        io_workers: int = 8,
+        cpu_workers: Optional[int] = None,
+        chunk_size: int = 32
+    ):
+        super().__init__(io_workers=io_workers)
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._cpu_pool = ProcessPoolExecutor(
+            max_workers=self.cpu_workers,
+            mp_context=multiprocessing.get_context(_start_method())
+        )
+
+    def map_cpu(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        items = list(items)
+        # Spread small batches over all workers instead of one big chunk
+        chunk_size = max(1, min(self.chunk_size, len(items) // self.cpu_workers))
+        return list(self._cpu_pool.map(fn, items, chunksize=chunk_size))
+
+    def shutdown(self) -> None:
+        super().shutdown()
+        self._cpu_pool.shutdown(wait=True)
+
+
+def create_executor(
+    backend: str = "thread",
+    io_workers: int = 8,
+    cpu_workers: Optional[int] = None,
+    chunk_size: int = 32
+) -> StageExecutor:
+    """
+    Create a stage executor by backend name.
+
+    Args:
+        backend: One of "serial", "thread" or "process"
+        io_workers: Thread count for I/O-bound stages
+        cpu_workers: Process count for CPU-bound stages (defaults to CPU count)
+        chunk_size: Maximum items sent to a worker process per round trip
+
+    Returns:
+        A StageExecutor for the requested backend
+    """
+    if backend == "serial":
+        return StageExecutor()
+    if backend == "thread":
+        return ThreadStageExecutor(io_workers=io_workers)
+    if backend == "process":
+        return ProcessStageExecutor(
+            io_workers=io_workers,
+            cpu_workers=cpu_workers,
+            chunk_size=chunk_size
+        )
+    raise ValueError(
+        f"Unknown executor backend '{backend}'. "
+        f"Choose one of: {', '.join(EXECUTOR_BACKENDS)}"
+    )
@@ -4,6 +4,14 @@ NY Times Article Search API integration.
 import requests
 from typing import List, Dict, Optional
 from config import settings
+from cassettes import CassetteMissError, get_cassette
+from dedup import dedupe_articles
+from cache import get_result_cache
+import json
+
+
+# Results returned per Article Search page
+NYT_PAGE_SIZE = 10
 
 
 class NYTArticle:
@@ -18,6 +26,11 @@ class NYTArticle:
         self.news_desk = article_data.get("news_desk", "")
         self.section_name = article_data.get("section_name", "")
         self.snippet = article_data.get("snippet", "")
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "NYTArticle":
+        """Rebuild an article from the flat format produced by to_dict."""
+        return cls({**data, "headline": {"main": data.get("headline") or "No headline"}})
         
     def to_dict(self) -> Dict:
         """Convert article to dictionary format."""
@@ -58,13 +71,23 @@ class NYTSearchTool:
         self.api_key = settings.nyt_api_key
         self.base_url = settings.nyt_api_base_url
         
+        # Route HTTP calls through the record/replay cassette when enabled
+        cassette = get_cassette()
+        self.http_get = cassette.http_get if cassette else requests.get
+        
+        self.cache = get_result_cache()
+        # API requests made by the most recent search (0 when served from cache)
+        self.last_request_count = 0
+        
     def search_articles(
         self,
         query: str,
         filters: Optional[Dict] = None,
         begin_date: Optional[str] = None,
         end_date: Optional[str] = None,
-        max_results: int = None
+        max_results: int = None,
+        refresh: bool = False,
+        dedup: Optional[bool] = None
     ) -> List[NYTArticle]:
         """
         Search for articles in the NY Times archive.
@@ -75,12 +98,19 @@ class NYTSearchTool:
             begin_date: Start date in YYYYMMDD format
             end_date: End date in YYYYMMDD format
             max_results: Maximum number of articles to return
+            refresh: Fetch from the API even when cached results are live,
+                and replace them
+            dedup: Drop near-duplicates and page on to refill the freed
+                slots; defaults to settings.dedup_articles. Batch runs pass
+                False and dedupe in a separate CPU stage
             
         Returns:
             List of NYTArticle objects
         """
         if max_results is None:
             max_results = settings.max_articles_to_fetch
+        if dedup is None:
+            dedup = settings.dedup_articles
             
         endpoint = f"{self.base_url}/articlesearch.json"
         
@@ -101,24 +131,61 @@ class NYTSearchTool:
         if end_date:
             params["end_date"] = end_date
             
-        try:
-            response = requests.get(endpoint, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            docs = data.get("response", {}).get("docs", [])
+        self.last_request_count = 0
+        cache_key = json.dumps(
+            {k: v for k, v in params.items() if k != "api-key"} | {"max_results": max_results, "dedup": dedup},
+            sort_keys=True
+        )
+        if self.cache is not None and not refresh:
+            cached = self.cache.get("articles", cache_key)
+            if cached is not None:
+                return [NYTArticle(doc) for doc in cached[0]]
             
-            # Convert to NYTArticle objects and limit results
-            articles = [NYTArticle(doc) for doc in docs[:max_results]]
+        # Near-duplicates free up slots, so keep paging until they are refilled
+        pages = settings.max_search_pages if dedup else 1
+        docs: List[Dict] = []
+        
+        try:
+            for page in range(pages):
+                if page:
+                    params["page"] = page
+                
+                self.last_request_count += 1
+                response = self.http_get(endpoint, params=params, timeout=10)
+                response.raise_for_status()
+                
+                data = response.json()
+                page_docs = data.get("response", {}).get("docs", [])
+                docs.extend(page_docs)
+                
+                if dedup:
+                    docs = dedupe_articles(
+                        docs,
+                        max_distance=settings.dedup_max_distance,
+                        min_jaccard=settings.dedup_min_jaccard
+                    )
+                    
+                if len(docs) >= max_results or len(page_docs) < NYT_PAGE_SIZE:
+                    break
             
-            return articles
+            if self.cache is not None and docs:
+                self.cache.put(
+                    "articles", cache_key, docs[:max_results],
+                    ttl=settings.article_cache_ttl_hours * 3600
+                )
             
+        except CassetteMissError:
+            # A replay that drifts from its recording must fail, not
+            # quietly continue with no articles
+            raise
         except requests.exceptions.RequestException as e:
             print(f"Error calling NY Times API: {e}")
-            return []
         except Exception as e:
             print(f"Error processing NY Times response: {e}")
-            return []
+        
+        # Convert to NYTArticle objects and limit results; pages fetched
+        # before an error are still used
+        return [NYTArticle(doc) for doc in docs[:max_results]]
     
     def format_articles_for_llm(self, articles: List[NYTArticle]) -> str:
         """Format articles in a readable format for LLM processing."""
@@ -1,19 +1,55 @@
 """
 Multi-agent orchestration using LangGraph.
 """
-from typing import Dict
+import uuid
+from typing import Dict, List, Optional
 from langgraph.graph import StateGraph, END
 from agents import (
     AgentState,
     SupervisorAgent,
     ResearchAgent,
     SummarizationAgent,
-    CriticalAnalystAgent
+    CriticalAnalystAgent,
+    FusedAnalysisAgent,
+    research_filters
 )
+from session import ChatSession, is_follow_up
+from config import settings
+from executors import StageExecutor, create_executor
+from postprocess import dedupe_job, pack_articles, render_packed_report
+from nyt_api import NYT_PAGE_SIZE, NYTSearchTool
+from dedup import article_text
+from cassettes import get_cassette
+from checkpointing import ResumableRunError, get_checkpoint_store, thread_id_for
+from cache import (
+    ORIGIN_WARMER,
+    OUTCOME_HIT,
+    OUTCOME_MISS,
+    OUTCOME_WARM_HIT,
+    get_query_log,
+    get_result_cache,
+    normalize_query
+)
+
 
+GRAPH_MODES = ("sequential", "fused")
 
-def create_workflow() -> StateGraph:
-    """Create the multi-agent workflow graph."""
+
+def create_workflow(defer_render: bool = False, mode: Optional[str] = None) -> StateGraph:
+    """
+    Create the multi-agent workflow graph.
+    
+    Args:
+        defer_render: End the graph after the analysis instead of compiling
+            the report, so batch runs can render reports off the I/O threads
+        mode: "sequential" runs separate summarization and analysis calls;
+            "fused" asks for both in one structured call. Defaults to the
+            GRAPH_MODE setting.
+    """
+    mode = mode or settings.graph_mode
+    if mode not in GRAPH_MODES:
+        raise ValueError(f"Unknown graph mode '{mode}'. Choose one of: {', '.join(GRAPH_MODES)}")
+    fused = mode == "fused"
     
     # Initialize agents
     supervisor = SupervisorAgent()
@@ -27,9 +63,14 @@ def create_workflow() -> StateGraph:
     # Add nodes for each agent
     workflow.add_node("supervisor_plan", supervisor.plan)
     workflow.add_node("research", research_agent.execute)
-    workflow.add_node("summarization", summarization_agent.execute)
+    if fused:
+        fused_agent = FusedAnalysisAgent(summarization_agent, critical_analyst)
+        workflow.add_node("fused_analysis", fused_agent.execute)
+    else:
+        workflow.add_node("summarization", summarization_agent.execute)
     workflow.add_node("critical_analyst", critical_analyst.execute)
-    workflow.add_node("supervisor_compile", supervisor.compile_final_output)
+    if not defer_render:
+        workflow.add_node("supervisor_compile", supervisor.compile_final_output)
     
     # Define routing function
     def route_agent(state: AgentState) -> str:
@@ -56,6 +97,7 @@ def create_workflow() -> StateGraph:
         route_agent,
         {
             "research": "research",
+            "critical_analyst": "critical_analyst",
             END: END
         }
     )
@@ -64,65 +106,207 @@ def create_workflow() -> StateGraph:
         "research",
         route_agent,
         {
-            "summarization": "summarization",
+            "summarization": "fused_analysis" if fused else "summarization",
             END: END
         }
     )
     
-    workflow.add_conditional_edges(
-        "summarization",
-        route_agent,
-        {
-            "critical_analyst": "critical_analyst",
-            END: END
-        }
-    )
+    if fused:
+        workflow.add_conditional_edges(
+            "fused_analysis",
+            route_agent,
+            {
+                "supervisor_compile": END if defer_render else "supervisor_compile",
+                END: END
+            }
+        )
+    else:
+        workflow.add_conditional_edges(
+            "summarization",
+            route_agent,
+            {
+                "critical_analyst": "critical_analyst",
+                END: END
+            }
+        )
     
     workflow.add_conditional_edges(
         "critical_analyst",
         route_agent,
         {
-            "supervisor_compile": "supervisor_compile",
+            "supervisor_compile": END if defer_render else "supervisor_compile",
             END: END
         }
     )
     
-    workflow.add_conditional_edges(
-        "supervisor_compile",
-        route_agent,
-        {
-            END: END
-        }
-    )
+    if not defer_render:
+        workflow.add_conditional_edges(
+            "supervisor_compile",
+            route_agent,
+            {
+                END: END
+            }
+        )
     
     return workflow
 
 
-def run_chatbot(user_query: str) -> str:
+def _initial_state(user_query: str) -> AgentState:
+    """Build the starting state for a single query."""
+    return {
+        "user_query": user_query,
+        "research_results": None,
+        "articles": None,
+        "summary": None,
+        "analysis": None,
+        "final_output": None,
+        "messages": [],
+        "next_agent": None,
+        "session_context": None,
+        "session_articles": None,
+        "trace": [],
+        "refresh_articles": False,
+        "prefetched_articles": None
+    }
+
+
+def run_chatbot(
+    user_query: str,
+    session: Optional[ChatSession] = None,
+    thread_id: Optional[str] = None
+) -> str:
     """
     Run the multi-agent chatbot workflow.
     
+    Reports for standalone questions are served from the result cache while
+    fresh, and every such question is written to the query log that the
+    cache warmer reads. When checkpointing is enabled, state is saved after
+    every node; if an earlier run of the same query failed, this run resumes
+    at the failed node instead of repeating the search and summary.
+    
     Args:
         user_query: The user's input query
+        session: Optional conversation memory; follow-up questions are
+            answered from it without a new search, and the run is recorded
+        thread_id: Checkpoint thread to run on. With a session it is derived
+            from the query and the session's state, so resubmitting the
+            query resumes a failed run; without one each call gets its own
+            thread, and a failed run is resumed by passing its id back
         
     Returns:
         Final compiled output
+        
+    Raises:
+        ResumableRunError: If a checkpointed run fails; carries the thread id
+            to retry with
+    """
+    cache = get_result_cache()
+    query_log = get_query_log()
+    
+    # Follow-ups depend on the conversation, so they are neither cached nor logged
+    follow_up = (
+        session is not None and not session.is_empty()
+        and is_follow_up(user_query, session.render_context())
+    )
+    cache_key = normalize_query(user_query)
+    
+    if cache is not None and not follow_up:
+        cached = cache.get("reports", cache_key)
+        if cached is not None:
+            report, origin = cached
+            warm = origin == ORIGIN_WARMER
+            print(f"\n⚡ Serving cached report{' (prewarmed)' if warm else ''} for: {user_query}")
+            query_log.record(user_query, OUTCOME_WARM_HIT if warm else OUTCOME_HIT)
+            if session is not None:
+                session.record({**report, "user_query": user_query})
+            return report["final_output"]
+    
+    final_state = _execute_graph(user_query, session, thread_id)
+    
+    if cache is not None and not follow_up:
+        query_log.record(user_query, OUTCOME_MISS)
+        if final_state.get("final_output"):
+            cache.put(
+                "reports", cache_key, _report_entry(final_state),
+                ttl=settings.report_cache_ttl_hours * 3600
+            )
+    
+    if session is not None and final_state.get("final_output"):
+        session.record(final_state)
+    
+    return final_state.get("final_output", "Error: No output generated")
+
+
+def warm_query(user_query: str) -> Dict:
+    """
+    Run a query off the user's critical path and cache its report as prewarmed.
+    
+    Search results are fetched fresh and replace any cached ones, so a
+    refreshed report is never rebuilt from articles as old as the report.
+    
+    Args:
+        user_query: The query to precompute
+        
+    Returns:
+        Cost of the run: NY Times requests and LLM tokens
+    """
+    final_state = _execute_graph(
+        user_query,
+        thread_id=f"warm-{thread_id_for(user_query)}",
+        refresh_articles=True
+    )
+    
+    cache = get_result_cache()
+    if cache is not None and final_state.get("final_output"):
+        cache.put(
+            "reports", normalize_query(user_query), _report_entry(final_state),
+            ttl=settings.report_cache_ttl_hours * 3600, origin=ORIGIN_WARMER
+        )
+    return usage_totals(final_state.get("trace"))
+
+
+def usage_totals(trace: Optional[List[Dict]]) -> Dict:
+    """Sum NY Times requests and LLM token counts over a run trace."""
+    totals = {"nyt_requests": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+    for entry in trace or []:
+        for key in totals:
+            totals[key] += entry.get(key, 0)
+    return totals
+
+
+def _report_entry(state: AgentState) -> Dict:
+    """Parts of a finished run worth caching."""
+    return {
+        "summary": state.get("summary"),
+        "analysis": state.get("analysis"),
+        "articles": state.get("articles") or [],
+        "final_output": state.get("final_output"),
+    }
+
+
+def _execute_graph(
+    user_query: str,
+    session: Optional[ChatSession] = None,
+    thread_id: Optional[str] = None,
+    refresh_articles: bool = False
+) -> AgentState:
+    """
+    Run the workflow graph once, with checkpoints when enabled.
+    
+    refresh_articles makes the search skip cached results and overwrite them.
     """
     # Create workflow
     workflow = create_workflow()
-    app = workflow.compile()
+    store = get_checkpoint_store()
+    app = workflow.compile(checkpointer=store.saver if store else None)
     
     # Initialize state
-    initial_state: AgentState = {
-        "user_query": user_query,
-        "research_results": None,
-        "articles": None,
-        "summary": None,
-        "analysis": None,
-        "final_output": None,
-        "messages": [],
-        "next_agent": None
-    }
+    initial_state = _initial_state(user_query)
+    initial_state["refresh_articles"] = refresh_articles
+    
+    if session is not None and not session.is_empty():
+        initial_state["session_context"] = session.render_context()
+        initial_state["session_articles"] = session.recent_articles()
     
     # Run workflow
     print("\n" + "=" * 80)
@@ -130,9 +314,131 @@ def run_chatbot(user_query: str) -> str:
     print("=" * 80)
     print(f"\n📥 User Query: {user_query}\n")
     
-    final_state = app.invoke(initial_state)
+    if store is None:
+        final_state = app.invoke(initial_state)
+    else:
+        if thread_id is None:
+            if session is not None:
+                thread_id = thread_id_for(user_query, f"{session.id}:{session.turn_count}")
+            else:
+                # Nothing ties separate callers together, so never share a thread
+                thread_id = uuid.uuid4().hex[:16]
+        config = {"configurable": {"thread_id": thread_id}}
+        store.maybe_prune()
+        
+        pending = app.get_state(config).next
+        store.mark(thread_id, "running", user_query)
+        try:
+            if pending:
+                print(f"↩️  Resuming earlier run at: {', '.join(pending)}")
+                final_state = app.invoke(None, config)
+            else:
+                final_state = app.invoke(initial_state, config)
+        except Exception as e:
+            store.mark(thread_id, "failed")
+            raise ResumableRunError(thread_id, e) from e
+        except BaseException:
+            store.mark(thread_id, "failed")
+            raise
+        store.finish(thread_id)
     
-    return final_state.get("final_output", "Error: No output generated")
+    usage = usage_totals(final_state.get("trace"))
+    print(
+        f"\n📊 Usage: {usage['nyt_requests']} NY Times requests, "
+        f"{usage['input_tokens']} input tokens ({usage['cached_tokens']} cached), "
+        f"{usage['output_tokens']} output tokens"
+    )
+    
+    return final_state
+
+
+
+
+def run_batch(queries: List[str], executor: Optional[StageExecutor] = None) -> List[str]:
+    """
+    Run many queries, keeping I/O and CPU work on separate executors.
+    
+    Stages alternate between the executor's I/O threads and its CPU stage:
+    
+        1. I/O: fetch one page of NY Times results per query
+        2. CPU: fingerprint and drop near-duplicates (SimHash and MinHash)
+        3. I/O: run the graph (LLM calls) on the deduplicated articles
+        4. CPU: render the reports from packed article batches
+    
+    Unlike a single search, a batch search does not page on to refill slots
+    freed by near-duplicates, so a query whose first page is mostly
+    duplicates can end up with fewer articles.
+    
+    Args:
+        queries: User queries to run
+        executor: Stage executor to use; defaults to the configured backend
+        
+    Returns:
+        Final reports, in the same order as the queries
+    """
+    owns_executor = executor is None
+    if owns_executor:
+        executor = create_executor(
+            settings.executor_backend,
+            io_workers=settings.executor_io_workers,
+            cpu_workers=settings.executor_cpu_workers
+        )
+    
+    app = create_workflow(defer_render=True).compile()
+    
+    def fetch_one(user_query: str):
+        tool = NYTSearchTool()
+        articles = tool.search_articles(
+            query=user_query,
+            filters=research_filters(user_query) or None,
+            max_results=NYT_PAGE_SIZE,
+            dedup=False
+        )
+        return [article.to_dict() for article in articles], tool.last_request_count
+    
+    def run_one(job) -> Dict:
+        user_query, articles, nyt_requests = job
+        state = _initial_state(user_query)
+        state["prefetched_articles"] = articles
+        state["trace"] = [{"node": "research", "nyt_requests": nyt_requests}]
+        try:
+            return app.invoke(state)
+        except Exception as e:
+            print(f"❌ Batch query failed ('{user_query}'): {e}")
+            return {"summary": f"Error: {e}", "analysis": None, "articles": []}
+    
+    try:
+        fetched = executor.map_io(fetch_one, queries)
+        
+        max_articles = settings.max_articles_to_fetch
+        if settings.dedup_articles:
+            dedupe_jobs = [
+                (
+                    tuple(article_text(article) for article in articles),
+                    settings.dedup_max_distance,
+                    settings.dedup_min_jaccard,
+                    max_articles
+                )
+                for articles, _ in fetched
+            ]
+            kept = executor.map_cpu(dedupe_job, dedupe_jobs)
+        else:
+            kept = [range(min(len(articles), max_articles)) for articles, _ in fetched]
+        
+        graph_jobs = [
+            (user_query, [articles[i] for i in indices], nyt_requests)
+            for user_query, (articles, nyt_requests), indices in zip(queries, fetched, kept)
+        ]
+        states = executor.map_io(run_one, graph_jobs)
+        
+        render_jobs = [
+            (state.get("summary"), state.get("analysis"), pack_articles(state.get("articles")))
+            for state in states
+        ]
+        return executor.map_cpu(render_packed_report, render_jobs)
+    finally:
+        if owns_executor:
+            executor.shutdown()
 
 
 if __name__ == "__main__":
@@ -141,4 +447,8 @@ if __name__ == "__main__":
     
     result = run_chatbot(test_query)
     print("\n" + result)
+    
+    cassette = get_cassette()
+    if cassette is not None:
+        print(f"\n📼 Cassette ({cassette.mode}): {cassette.stats}")
 
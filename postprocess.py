@@ -0,0 +1,92 @@
+"""
+CPU-bound post-processing for research results.
+
+Everything here is pure and free of configuration or network access, so it can
+run inside worker processes without importing the agents or API clients.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from dedup import unique_indices
+
+
+# Fields needed to render a source entry, in packed order
+PACKED_ARTICLE_FIELDS = ("headline", "pub_date", "web_url")
+
+PackedArticle = Tuple[str, str, str]
+ReportJob = Tuple[Optional[str], Optional[str], Tuple[PackedArticle, ...]]
+DedupeJob = Tuple[Tuple[str, ...], int, float, int]
+
+
+def pack_articles(articles: Optional[List[Dict]]) -> Tuple[PackedArticle, ...]:
+    """
+    Reduce article dicts to plain tuples of the fields used for rendering.
+
+    Tuples of strings pickle far smaller and faster than the full dicts, which
+    matters when batches are shipped to worker processes.
+    """
+    if not articles:
+        return ()
+    return tuple(
+        tuple(article.get(field, "") for field in PACKED_ARTICLE_FIELDS)
+        for article in articles
+    )
+
+
+def unpack_articles(packed: Tuple[PackedArticle, ...]) -> List[Dict]:
+    """Restore article dicts from their packed form."""
+    return [dict(zip(PACKED_ARTICLE_FIELDS, article)) for article in packed]
+
+
+def dedupe_job(job: DedupeJob) -> List[int]:
+    """
+    Indices of the articles to keep from a (texts, max_distance, min_jaccard,
+    limit) job: SimHash and MinHash fingerprinting plus near-duplicate
+    removal, the heaviest CPU work in a batch.
+    """
+    texts, max_distance, min_jaccard, limit = job
+    kept = unique_indices(texts, max_distance=max_distance, min_jaccard=min_jaccard)
+    return kept[:limit]
+
+
+def render_report(
+    summary: Optional[str],
+    analysis: Optional[str],
+    articles: Optional[List[Dict]]
+) -> str:
+    """Render the structured research report."""
+    summary = summary or "No summary available."
+    analysis = analysis or "No analysis available."
+
+    output_sections = []
+
+    output_sections.append("=" * 80)
+    output_sections.append("NY TIMES AI CHATBOT - RESEARCH REPORT")
+    output_sections.append("=" * 80)
+
+    output_sections.append("\n📰 SECTION 1: FACTUAL SUMMARY")
+    output_sections.append("-" * 80)
+    output_sections.append(summary)
+
+    output_sections.append("\n\n💡 SECTION 2: CRITICAL ANALYSIS")
+    output_sections.append("-" * 80)
+    output_sections.append(analysis)
+
+    output_sections.append("\n\n🔗 SECTION 3: SOURCE ARTICLES")
+    output_sections.append("-" * 80)
+    if articles:
+        for i, article in enumerate(articles, 1):
+            output_sections.append(f"\n{i}. {article['headline']}")
+            output_sections.append(f"   Published: {article['pub_date']}")
+            output_sections.append(f"   Link: {article['web_url']}")
+    else:
+        output_sections.append("No source articles available.")
+
+    output_sections.append("\n" + "=" * 80)
+
+    return "\n".join(output_sections)
+
+
+def render_packed_report(job: ReportJob) -> str:
+    """Render a report from a (summary, analysis, packed_articles) job."""
+    summary, analysis, packed = job
+    return render_report(summary, analysis, unpack_articles(packed))
@@ -0,0 +1,158 @@
+"""
+Prompt assembly for the LLM agents.
+
+Providers cache prompt prefixes: a request whose leading tokens match a recent
+request is billed and processed faster for the cached part. To make that hit,
+every agent sends the same content in the same order:
+
+    1. a stable system prompt, identical for all agents
+    2. the article corpus, identical for all agents working on one query
+    3. the agent's own instructions, the user query and any earlier output
+
+Everything that varies per agent or per call comes last, so the summarization,
+analysis and fused calls for one query share the whole system + corpus prefix.
+"""
+from typing import Any, Dict, List
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+
+SYSTEM_PROMPT = """You are part of a multi-agent research assistant that answers questions using NY Times articles.
+The articles retrieved for the user's query come first. Your specific task, the user's query and any
+earlier output from other agents follow after the articles. Base factual statements on the articles."""
+
+SUMMARY_TASK = """You are the factual summarization agent.
+Your job is to create a clear, objective summary of the key facts from the provided articles.
+
+Rules:
+- Focus on factual information only
+- Combine information from multiple articles coherently
+- Maintain journalistic objectivity
+- Highlight the most important developments
+- Keep the summary concise but comprehensive (2-3 paragraphs)
+- Do NOT add your own opinions or analysis
+
+User Query: {user_query}
+
+Please create a factual summary of the key developments related to the user's query."""
+
+ANALYSIS_TASK = """You are the critical analyst agent, with expertise in business strategy and market analysis.
+Your job is to provide insightful analysis that goes beyond the facts.
+
+Based on the user's query and the factual summary, you should:
+- Identify implicit questions or analytical needs in the user's query
+- Provide strategic insights and implications
+- Analyze trends, opportunities, or challenges
+- Offer expert commentary on the significance of the developments
+- Be thoughtful and nuanced in your analysis
+
+Use the articles above to inform your analysis.
+
+User Query: {user_query}
+
+Factual Summary:
+{summary}
+
+Please provide a thoughtful analysis that addresses any analytical aspects of the user's query.
+Pay special attention to phrases like "explain the opportunity," "analyze the impact," or "what does this mean for..."
+"""
+
+FUSED_TASK = """You write two sections in one response.
+
+Section "summary" - a factual summary:
+- Focus on factual information only
+- Combine information from multiple articles coherently
+- Maintain journalistic objectivity
+- Highlight the most important developments
+- Keep the summary concise but comprehensive (2-3 paragraphs)
+- Do NOT add your own opinions or analysis
+
+Section "analysis" - a critical analysis with expertise in business strategy and market analysis:
+- Identify implicit questions or analytical needs in the user's query
+- Provide strategic insights and implications
+- Analyze trends, opportunities, or challenges
+- Offer expert commentary on the significance of the developments
+- Be thoughtful and nuanced in your analysis
+- Pay special attention to phrases like "explain the opportunity," "analyze the impact," or "what does this mean for..."
+
+User Query: {user_query}
+
+Respond with a single JSON object and nothing else:
+{{"summary": "<factual summary>", "analysis": "<critical analysis>"}}"""
+
+
+def _build_messages(research_results: str, task: str) -> List[BaseMessage]:
+    """Assemble messages as stable system text, corpus, then task."""
+    return [
+        SystemMessage(content=SYSTEM_PROMPT),
+        HumanMessage(content=f"Articles Found:\n{research_results}"),
+        HumanMessage(content=task),
+    ]
+
+
+def build_summary_messages(research_results: str, user_query: str) -> List[BaseMessage]:
+    """Messages for the summarization agent."""
+    return _build_messages(research_results, SUMMARY_TASK.format(user_query=user_query))
+
+
+def build_analysis_messages(research_results: str, user_query: str, summary: str) -> List[BaseMessage]:
+    """Messages for the critical analyst agent."""
+    return _build_messages(
+        research_results,
+        ANALYSIS_TASK.format(user_query=user_query, summary=summary)
+    )
+
+
+def build_fused_messages(research_results: str, user_query: str) -> List[BaseMessage]:
+    """Messages for the fused summary-and-analysis agent."""
+    return _build_messages(research_results, FUSED_TASK.format(user_query=user_query))
+
+
+def serialize(messages: List[BaseMessage]) -> str:
+    """Flatten messages in send order, as a provider sees the prompt."""
+    return "".join(f"<{message.type}>{message.content}" for message in messages)
+
+
+def shared_prefix_length(first: List[BaseMessage], second: List[BaseMessage]) -> int:
+    """Number of leading characters two prompts have in common."""
+    a, b = serialize(first), serialize(second)
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+def cached_tokens(response: Any) -> int:
+    """
+    Prompt tokens the provider served from its cache for a response.
+
+    Reads LangChain's normalized usage metadata first, then OpenAI's raw
+    token usage; returns 0 when the provider reports nothing.
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    if details.get("cache_read") is not None:
+        return details["cache_read"]
+
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    prompt_details = token_usage.get("prompt_tokens_details") or {}
+    return prompt_details.get("cached_tokens") or 0
+
+
+def usage_entry(node: str, response: Any) -> Dict:
+    """Trace entry with the token usage of one LLM call."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    return {
+        "node": node,
+        "input_tokens": usage.get("input_tokens", 0),
+        "output_tokens": usage.get("output_tokens", 0),
+        "cached_tokens": cached_tokens(response),
+    }
+
+
+def stable_prefix_chars(research_results: str) -> int:
+    """Length of the prefix shared by every agent for this article corpus."""
+    return len(serialize(_build_messages(research_results, "")[:2]))
+
@@ -0,0 +1,248 @@
+"""
+Conversational session memory for the NY Times AI Chatbot.
+
+Keeps a compact, token-bounded history of previous turns (articles, summaries
+and analyses) so follow-up questions can be answered without redoing research.
+"""
+import re
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from config import settings
+
+
+# Summary section of a follow-up answer, which adds no new facts
+FOLLOW_UP_SUMMARY = "Answered from earlier in this conversation."
+
+# Rough characters-per-token ratio used to keep the history within budget
+CHARS_PER_TOKEN = 4
+
+# Phrases that usually mark a question building on the previous answer
+FOLLOW_UP_PREFIXES = (
+    "what about",
+    "how about",
+    "and ",
+    "tell me more",
+    "more on",
+    "expand on",
+    "elaborate",
+    "can you explain",
+    "explain that",
+    "what does that",
+    "what does this",
+)
+
+# Words referring back to something discussed earlier
+FOLLOW_UP_REFERENCES = {"it", "its", "that", "this", "they", "them", "their", "those", "these", "above"}
+
+# Words asking for fresh news, which cached context cannot provide
+FRESH_NEWS_MARKERS = {"latest", "new", "newest", "recent", "today", "yesterday", "current", "breaking"}
+
+# Words that carry no topic, ignored when matching a query against the session
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "of", "to", "in", "on", "for", "with", "about", "at", "by",
+    "from", "as", "is", "are", "was", "were", "be", "been", "do", "does", "did", "has", "have", "had",
+    "what", "why", "how", "who", "when", "where", "which", "can", "could", "would", "should", "will",
+    "you", "me", "i", "we", "us", "my", "our", "your", "so", "then", "there", "more", "tell", "explain",
+    "expand", "elaborate", "mean", "means", "side", "part", "there's", "what's", "it's", "that's",
+}
+
+# Share of a follow-up's own terms that must appear in the session
+MIN_TERM_OVERLAP = 0.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a piece of text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _truncate(text: Optional[str], max_chars: int) -> str:
+    """Shorten text to max_chars, cutting at a word boundary."""
+    text = (text or "").strip()
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0]
+    return cut + " ..."
+
+
+class SessionTurn:
+    """A single compacted question/answer exchange."""
+
+    def __init__(self, query: str, summary: str, analysis: str, article_urls: List[str]):
+        self.query = query
+        self.summary = summary
+        self.analysis = analysis
+        self.article_urls = article_urls
+
+    def render(self, include_analysis: bool = True) -> str:
+        """Render the turn as compact text for the LLM."""
+        parts = [f"Q: {self.query}"]
+        if self.summary:
+            parts.append(f"Summary: {self.summary}")
+        if include_analysis and self.analysis:
+            parts.append(f"Analysis: {self.analysis}")
+        return "\n".join(parts)
+
+
+class ChatSession:
+    """Compact, bounded memory of a conversation with the chatbot."""
+
+    def __init__(
+        self,
+        max_context_tokens: int = None,
+        max_turns: int = None,
+        max_articles: int = None
+    ):
+        if max_context_tokens is None:
+            max_context_tokens = settings.session_max_context_tokens
+        if max_turns is None:
+            max_turns = settings.session_max_turns
+        if max_articles is None:
+            max_articles = settings.session_max_articles
+
+        # Scopes checkpoint thread ids to this conversation
+        self.id = uuid.uuid4().hex
+        self.max_context_tokens = max_context_tokens
+        self.max_articles = max_articles
+        self.turns: Deque[SessionTurn] = deque(maxlen=max_turns)
+        # Runs started in this conversation; unlike len(turns) it never
+        # stops growing when old turns fall out or the session is reset
+        self.turn_count = 0
+        self.articles: Dict[str, Dict] = {}
+
+    def is_empty(self) -> bool:
+        """Check whether anything has been recorded yet."""
+        return not self.turns
+
+    def reset(self) -> None:
+        """Forget the whole conversation."""
+        self.turns.clear()
+        self.articles.clear()
+
+    def record(self, state: Dict) -> None:
+        """Store a finished run in compacted form."""
+        articles = state.get("articles") or []
+        for article in articles:
+            url = article.get("web_url") or article.get("headline", "")
+            # Re-inserting moves the article to the most recent position
+            self.articles.pop(url, None)
+            self.articles[url] = {
+                "headline": article.get("headline", ""),
+                "pub_date": article.get("pub_date", ""),
+                "web_url": article.get("web_url", ""),
+                "abstract": _truncate(article.get("abstract") or article.get("lead_paragraph"), 300),
+            }
+        while len(self.articles) > self.max_articles:
+            self.articles.pop(next(iter(self.articles)))
+
+        summary = _truncate(state.get("summary"), 800)
+        # Follow-ups repeat no facts; storing their summary again would only
+        # crowd earlier turns out of the context budget
+        if summary == FOLLOW_UP_SUMMARY or (self.turns and summary == self.turns[-1].summary):
+            summary = ""
+
+        self.turn_count += 1
+        self.turns.append(SessionTurn(
+            query=state.get("user_query", ""),
+            summary=summary,
+            analysis=_truncate(state.get("analysis"), 600),
+            article_urls=[a.get("web_url", "") for a in articles],
+        ))
+
+    def latest_summary(self) -> str:
+        """Return the most recent turn's summary, skipping follow-ups."""
+        for turn in reversed(self.turns):
+            if turn.summary:
+                return turn.summary
+        return ""
+
+    def recent_articles(self) -> List[Dict]:
+        """Return cached articles, most recent first."""
+        return list(reversed(self.articles.values()))
+
+    def render_context(self) -> str:
+        """
+        Render the session as compact text within the token budget.
+
+        Newer turns are kept first; older turns lose their analysis and are
+        then dropped entirely once the budget is used up.
+        """
+        budget = self.max_context_tokens
+        article_lines = []
+        for i, article in enumerate(self.recent_articles(), 1):
+            line = f"--- Article {i} ---\nTitle: {article['headline']}\nPublished: {article['pub_date']}"
+            if article["abstract"]:
+                line += f"\nAbstract: {article['abstract']}"
+            line += f"\nURL: {article['web_url']}"
+            cost = estimate_tokens(line)
+            if cost > budget:
+                break
+            article_lines.append(line)
+            budget -= cost
+
+        turn_blocks = []
+        for turn in reversed(self.turns):
+            block = turn.render()
+            if estimate_tokens(block) > budget:
+                block = turn.render(include_analysis=False)
+            cost = estimate_tokens(block)
+            if cost > budget:
+                break
+            turn_blocks.append(block)
+            budget -= cost
+
+        sections = []
+        if turn_blocks:
+            sections.append("Earlier in this conversation:\n\n" + "\n\n".join(reversed(turn_blocks)))
+        if article_lines:
+            sections.append("Articles already retrieved:\n" + "\n".join(article_lines))
+        return "\n\n".join(sections)
+
+    def context_tokens(self) -> int:
+        """Estimate the token footprint of the rendered context."""
+        return estimate_tokens(self.render_context())
+
+
+def _terms(text: str) -> set:
+    """Topic terms of a text, with a crude plural fold."""
+    terms = set()
+    for word in re.findall(r"[a-z0-9']+", text.lower()):
+        if word in STOPWORDS or word in FOLLOW_UP_REFERENCES:
+            continue
+        terms.add(word[:-1] if len(word) > 3 and word.endswith("s") else word)
+    return terms
+
+
+def is_follow_up(query: str, context: str) -> bool:
+    """
+    Decide whether a query builds on the previous answer rather than
+    asking about a new topic.
+
+    A query counts as a follow-up only when it is phrased as one (a
+    continuation prefix, or nothing but references back like "why is
+    that?") and any topic terms it names already appear in the session
+    context. When unsure, it is not a follow-up, so research runs.
+
+    Args:
+        query: The user's input query
+        context: Rendered session context the answer would be based on
+    """
+    text = query.lower().strip()
+    words = re.findall(r"[a-z0-9']+", text)
+    if not words or not context:
+        return False
+
+    # Requests for fresh news always need a new search
+    if FRESH_NEWS_MARKERS.intersection(words):
+        return False
+
+    terms = _terms(text)
+    if not text.startswith(FOLLOW_UP_PREFIXES):
+        # Without a continuation phrase, only a bare reference back qualifies
+        return not terms and bool(FOLLOW_UP_REFERENCES.intersection(words))
+
+    if not terms:
+        return True
+    overlap = len(terms & _terms(context)) / len(terms)
+    return overlap >= MIN_TERM_OVERLAP
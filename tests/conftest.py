@@ -0,0 +1,10 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config validates keys at import; in-process tests never call the real APIs
+os.environ.setdefault("NYT_API_KEY", "test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("RESULT_CACHE", "false")
+os.environ.setdefault("CHECKPOINTING", "false")
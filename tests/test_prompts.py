@@ -0,0 +1,81 @@
+"""
+Prefix stability of the prompts the agents actually send.
+
+Provider prompt caching only pays off when every agent working on one query
+sends the same system prompt and article corpus before anything that varies.
+"""
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+import agents
+from prompts import SYSTEM_PROMPT, serialize, shared_prefix_length, stable_prefix_chars
+
+
+CORPUS = "\n".join(
+    f"\n--- Article {i} ---\nTitle: Launch providers race for orbit ({i})\n"
+    f"Published: 2024-05-01T12:00:00+0000\nAbstract: Private companies expand launch capacity.\n"
+    f"URL: https://www.nytimes.com/2024/05/01/science/launch-{i}.html"
+    for i in range(1, 4)
+)
+
+# What every prompt must start with: the system prompt, then the corpus
+EXPECTED_PREFIX = serialize([
+    SystemMessage(content=SYSTEM_PROMPT),
+    HumanMessage(content=f"Articles Found:\n{CORPUS}"),
+])
+
+
+class RecordingModel:
+    """Chat model stand-in that keeps every prompt it receives."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages, **kwargs):
+        self.prompts.append(messages)
+        if kwargs.get("response_format"):
+            return AIMessage(content=json.dumps({"summary": "A summary.", "analysis": "An analysis."}))
+        return AIMessage(content="A summary.")
+
+
+def _state(user_query):
+    return {"user_query": user_query, "research_results": CORPUS, "articles": []}
+
+
+def _agent_prompts(user_query):
+    """Prompts sent by the summarization, analysis and fused agents for one query."""
+    model = RecordingModel()
+    summarization = agents.SummarizationAgent()
+    analyst = agents.CriticalAnalystAgent()
+    fused = agents.FusedAnalysisAgent(summarization, analyst)
+    summarization.llm = analyst.llm = fused.llm = model
+
+    state = summarization.execute(_state(user_query))
+    analyst.execute(state)
+    fused.execute(_state(user_query))
+    return model.prompts
+
+
+def test_agents_share_system_and_corpus_prefix():
+    prompts = _agent_prompts("space exploration")
+
+    assert len(prompts) == 3
+    for prompt in prompts:
+        assert serialize(prompt).startswith(EXPECTED_PREFIX)
+    assert stable_prefix_chars(CORPUS) == len(EXPECTED_PREFIX)
+    assert shared_prefix_length(prompts[0], prompts[1]) >= len(EXPECTED_PREFIX)
+
+
+def test_prefix_does_not_depend_on_the_query():
+    first = _agent_prompts("space exploration")[0]
+    second = _agent_prompts("a different question")[0]
+
+    assert shared_prefix_length(first, second) >= len(EXPECTED_PREFIX)
+
+
+def test_prompts_are_deterministic():
+    first = _agent_prompts("space exploration")
+    second = _agent_prompts("space exploration")
+
+    assert [serialize(prompt) for prompt in first] == [serialize(prompt) for prompt in second]
@@ -0,0 +1,182 @@
+"""
+Cache warmer tests: a stub runner, an in-memory result cache and a fake
+clock stand in for the graph, the cache file and the passage of time.
+"""
+import time
+
+import orchestrator
+from cache import ORIGIN_WARMER, OUTCOME_MISS, QueryLog, ResultCache, normalize_query
+from warmer import DEFAULT_QUERY_TOKENS, CacheWarmer
+
+HOUR = 3600
+
+
+def _at_local_hour(hour: int) -> float:
+    """Timestamp of a fixed day at the given local hour."""
+    return time.mktime((2026, 5, 1, hour, 0, 0, 0, 0, -1))
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class StubRunner:
+    """Caches a prewarmed report for each query it is given, like warm_query."""
+
+    def __init__(self, cache: ResultCache, cost: dict = None, error: Exception = None):
+        self.cache = cache
+        self.cost = cost or {"nyt_requests": 1, "input_tokens": 300, "output_tokens": 100}
+        self.error = error
+        self.queries = []
+
+    def __call__(self, query: str) -> dict:
+        self.queries.append(query)
+        if self.error is not None:
+            raise self.error
+        report = {"summary": "", "analysis": "", "articles": [], "final_output": f"Report on {query}"}
+        self.cache.put("reports", normalize_query(query), report, ttl=6 * HOUR, origin=ORIGIN_WARMER)
+        return self.cost
+
+
+def _warmer(tmp_path, clock, **kwargs):
+    cache = ResultCache(":memory:", clock=clock)
+    log = QueryLog(str(tmp_path / "query_log.jsonl"), clock=clock)
+    runner = kwargs.pop("runner", None) or StubRunner(cache)
+    options = {
+        "top_n": 10,
+        "window_hours": 24,
+        "half_life_hours": 6,
+        "off_peak_hours": "",
+        "max_nyt_requests": 100,
+        "max_llm_tokens": 100000,
+        "report_ttl_hours": 6,
+        "max_query_nyt_requests": 1,
+    }
+    options.update(kwargs)
+    warmer = CacheWarmer(query_log=log, cache=cache, runner=runner, clock=clock, sleep=lambda _: None, **options)
+    return warmer, runner
+
+
+def _log(warmer, clock, query: str, at: float, times: int = 1) -> None:
+    now = clock.now
+    clock.now = at
+    for _ in range(times):
+        warmer.query_log.record(query, OUTCOME_MISS)
+    clock.now = now
+
+
+def test_rank_queries_weights_recent_queries_higher(tmp_path):
+    clock = FakeClock(_at_local_hour(12))
+    warmer, _ = _warmer(tmp_path, clock)
+    _log(warmer, clock, "Mars rover", clock.now - 12 * HOUR, times=3)
+    _log(warmer, clock, "moon landing", clock.now - 10 * 60, times=1)
+    _log(warmer, clock, "Moon landing?", clock.now, times=1)
+    _log(warmer, clock, "solar eclipse", clock.now - 30 * HOUR, times=5)
+
+    ranked = warmer.rank_queries()
+
+    # Two recent asks outweigh three half-day-old ones; the latest wording
+    # is kept, and entries outside the window are ignored
+    assert [query for query, _ in ranked] == ["Moon landing?", "Mars rover"]
+    assert ranked[0][1] > ranked[1][1]
+
+
+def test_off_peak_window_wraps_past_midnight(tmp_path):
+    clock = FakeClock(_at_local_hour(12))
+    warmer, runner = _warmer(tmp_path, clock, off_peak_hours="22-3")
+    _log(warmer, clock, "Mars rover", clock.now)
+
+    for hour, expected in [(21, False), (22, True), (23, True), (0, True), (2, True), (3, False), (12, False)]:
+        clock.now = _at_local_hour(hour)
+        assert warmer.is_off_peak() is expected, hour
+
+    clock.now = _at_local_hour(12)
+    assert warmer.run_cycle()["ran"] is False
+    assert runner.queries == []
+    assert warmer.run_cycle(force=True)["warmed"] == ["Mars rover"]
+
+
+def test_cycle_stops_at_nyt_request_budget(tmp_path):
+    clock = FakeClock(_at_local_hour(2))
+    warmer, runner = _warmer(tmp_path, clock, max_nyt_requests=5, max_query_nyt_requests=2)
+    runner.cost = {"nyt_requests": 2, "input_tokens": 300, "output_tokens": 100}
+    for i, query in enumerate(["alpha", "beta", "gamma", "delta"]):
+        _log(warmer, clock, query, clock.now - i * 60)
+
+    summary = warmer.run_cycle()
+
+    assert runner.queries == ["alpha", "beta"]
+    assert summary["warmed"] == ["alpha", "beta"]
+    assert summary["nyt_requests"] == 4
+
+
+def test_cycle_stops_at_llm_token_budget(tmp_path):
+    clock = FakeClock(_at_local_hour(2))
+    warmer, runner = _warmer(tmp_path, clock, max_llm_tokens=2 * DEFAULT_QUERY_TOKENS)
+    runner.cost = {"nyt_requests": 1, "input_tokens": DEFAULT_QUERY_TOKENS, "output_tokens": 0}
+    for i, query in enumerate(["alpha", "beta", "gamma"]):
+        _log(warmer, clock, query, clock.now - i * 60)
+
+    summary = warmer.run_cycle()
+
+    assert summary["warmed"] == ["alpha", "beta"]
+    assert summary["llm_tokens"] == 2 * DEFAULT_QUERY_TOKENS
+
+
+def test_fresh_reports_are_skipped_and_expiring_ones_refreshed(tmp_path):
+    clock = FakeClock(_at_local_hour(2))
+    warmer, runner = _warmer(tmp_path, clock)
+    for query in ["fresh", "expiring", "missing"]:
+        _log(warmer, clock, query, clock.now)
+    warmer.cache.put("reports", "fresh", {"final_output": "x"}, ttl=5 * HOUR)
+    # Less than a quarter of the report lifetime left
+    warmer.cache.put("reports", "expiring", {"final_output": "x"}, ttl=1 * HOUR)
+
+    summary = warmer.run_cycle()
+
+    assert summary["fresh"] == 1
+    assert sorted(runner.queries) == ["expiring", "missing"]
+
+    # A second cycle finds everything freshly warmed
+    assert warmer.run_cycle()["warmed"] == []
+
+
+def test_failed_queries_are_charged_their_estimate(tmp_path):
+    clock = FakeClock(_at_local_hour(2))
+    cache = ResultCache(":memory:", clock=clock)
+    runner = StubRunner(cache, error=RuntimeError("NY Times is down"))
+    warmer, _ = _warmer(tmp_path, clock, runner=runner, max_nyt_requests=5, max_query_nyt_requests=2)
+    for i, query in enumerate(["alpha", "beta", "gamma"]):
+        _log(warmer, clock, query, clock.now - i * 60)
+
+    summary = warmer.run_cycle()
+
+    # Failures still use up the budget, so the third query never runs
+    assert runner.queries == ["alpha", "beta"]
+    assert summary["failed"] == 2
+    assert summary["nyt_requests"] == 4
+    assert summary["llm_tokens"] == 2 * DEFAULT_QUERY_TOKENS
+    assert warmer.stats()["failed"] == 2
+    assert warmer.stats()["nyt_requests"] == 4
+
+
+def test_warm_hit_ratio_counts_prewarmed_reports_served(tmp_path, monkeypatch):
+    clock = FakeClock(_at_local_hour(2))
+    warmer, _ = _warmer(tmp_path, clock)
+    monkeypatch.setattr(orchestrator, "get_result_cache", lambda: warmer.cache)
+    monkeypatch.setattr(orchestrator, "get_query_log", lambda: warmer.query_log)
+    _log(warmer, clock, "Mars rover", clock.now - HOUR, times=2)
+    _log(warmer, clock, "solar eclipse", clock.now - HOUR)
+
+    warmer.run_cycle()
+    output = orchestrator.run_chatbot("mars rover")
+
+    assert output == "Report on Mars rover"
+    stats = warmer.stats()
+    assert stats["queries"] == 4
+    assert stats["warm_hit_ratio"] == 0.25
+    assert stats["hit_ratio"] == 0.25
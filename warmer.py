@@ -0,0 +1,277 @@
+"""
+Background cache warmer for trending queries.
+
+Reads the query log written by run_chatbot, ranks normalized queries by
+recency-weighted frequency, and during off-peak hours re-runs the top ones so
+their search results and reports are already cached when users ask. Each
+cycle stays within a NY Times request budget; its LLM token budget is
+checked against the average cost per query, so it can be exceeded by at most
+one query. A query that fails is charged its estimated cost, since the calls
+it made before failing are not reported back.
+
+The clock, sleep function and query runner are injectable, so the warmer can
+be driven with stub backends and simulated time.
+
+Usage:
+    python warmer.py              # run cycles forever
+    python warmer.py --once       # run a single cycle
+    python warmer.py --once --force   # ignore the off-peak window
+"""
+import argparse
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from cache import (
+    OUTCOME_HIT,
+    OUTCOME_WARM_HIT,
+    QueryLog,
+    ResultCache,
+    get_query_log,
+    get_result_cache,
+    normalize_query
+)
+
+
+# LLM tokens assumed for a query before any has been measured
+DEFAULT_QUERY_TOKENS = 4000
+
+
+def parse_hour_window(spec: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse an "H1-H2" window of local hours; H2 is exclusive and may wrap
+    past midnight. An empty spec means any hour.
+    """
+    if not spec:
+        return None
+    start, end = (int(part) for part in spec.split("-"))
+    return start % 24, end % 24
+
+
+class CacheWarmer:
+    """Precomputes reports for the most requested recent queries."""
+
+    def __init__(
+        self,
+        query_log: QueryLog = None,
+        cache: ResultCache = None,
+        runner: Callable[[str], Dict] = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+        top_n: int = None,
+        window_hours: float = None,
+        half_life_hours: float = None,
+        off_peak_hours: str = None,
+        max_nyt_requests: int = None,
+        max_llm_tokens: int = None,
+        report_ttl_hours: float = None,
+        refresh_margin: float = 0.25,
+        max_query_nyt_requests: int = None
+    ):
+        """
+        Args:
+            query_log: Log of user queries to rank
+            cache: Result cache the runner writes reports into
+            runner: Runs one query and returns its cost; defaults to
+                orchestrator.warm_query
+            clock: Returns the current time in seconds
+            sleep: Waits between cycles
+            top_n: How many top queries to consider per cycle
+            window_hours: How far back the log is read
+            half_life_hours: Age at which a logged query counts half
+            off_peak_hours: "H1-H2" local hours in which cycles may run
+            max_nyt_requests: NY Times request budget per cycle
+            max_llm_tokens: LLM token budget per cycle
+            report_ttl_hours: Lifetime of cached reports
+            refresh_margin: Share of the lifetime left below which a cached
+                report is refreshed
+            max_query_nyt_requests: Most NY Times requests one query can
+                make; defaults to the search page limit
+        """
+        self.query_log = query_log or get_query_log()
+        self.cache = cache or get_result_cache()
+        self.runner = runner
+        self.clock = clock
+        self.sleep = sleep
+        self.top_n = top_n if top_n is not None else settings.warm_top_n
+        self.window = (window_hours if window_hours is not None else settings.warm_window_hours) * 3600
+        self.half_life = (half_life_hours if half_life_hours is not None else settings.warm_half_life_hours) * 3600
+        self.off_peak = parse_hour_window(
+            off_peak_hours if off_peak_hours is not None else settings.warm_off_peak_hours
+        )
+        self.max_nyt_requests = max_nyt_requests if max_nyt_requests is not None else settings.warm_max_nyt_requests
+        self.max_llm_tokens = max_llm_tokens if max_llm_tokens is not None else settings.warm_max_llm_tokens
+        self.report_ttl = (report_ttl_hours if report_ttl_hours is not None else settings.report_cache_ttl_hours) * 3600
+        self.refresh_margin = refresh_margin
+        if max_query_nyt_requests is None:
+            max_query_nyt_requests = settings.max_search_pages if settings.dedup_articles else 1
+        self.max_query_nyt_requests = max_query_nyt_requests
+
+        self.totals = {"cycles": 0, "warmed": 0, "failed": 0, "nyt_requests": 0, "llm_tokens": 0}
+
+    def _run_query(self, query: str) -> Dict:
+        """Run one query through the configured runner."""
+        if self.runner is None:
+            # Imported lazily so stub runners never load the agents
+            from orchestrator import warm_query
+            self.runner = warm_query
+        return self.runner(query)
+
+    def rank_queries(self) -> List[Tuple[str, float]]:
+        """
+        Rank normalized queries by recency-weighted frequency.
+
+        Returns:
+            (query, score) pairs, highest score first; the query text is the
+            most recent wording users typed
+        """
+        now = self.clock()
+        scores: Dict[str, float] = {}
+        latest_text: Dict[str, str] = {}
+        for entry in self.query_log.entries(since=now - self.window):
+            key = entry["normalized"]
+            if not key:
+                continue
+            age = max(now - entry["ts"], 0.0)
+            scores[key] = scores.get(key, 0.0) + 0.5 ** (age / self.half_life)
+            latest_text[key] = entry["query"]
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [(latest_text[key], score) for key, score in ranked[:self.top_n]]
+
+    def is_off_peak(self) -> bool:
+        """Check whether the clock is inside the off-peak window."""
+        if self.off_peak is None:
+            return True
+        hour = time.localtime(self.clock()).tm_hour
+        start, end = self.off_peak
+        if start <= end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    def needs_warming(self, query: str) -> bool:
+        """Check whether a query's cached report is missing or about to expire."""
+        expires_at = self.cache.expires_at("reports", normalize_query(query))
+        if expires_at is None:
+            return True
+        return expires_at - self.clock() < self.refresh_margin * self.report_ttl
+
+    def _estimated_cost(self) -> Dict:
+        """
+        Cost to budget for the next query.
+
+        NY Times requests use the per-query maximum, so that budget is never
+        exceeded. LLM tokens have no such bound and use the average measured
+        so far, so a cycle can overshoot the token budget by one query.
+        """
+        # Failed queries were charged an earlier estimate, so they count too
+        charged = self.totals["warmed"] + self.totals["failed"]
+        if charged:
+            llm_tokens = round(self.totals["llm_tokens"] / charged)
+        else:
+            llm_tokens = DEFAULT_QUERY_TOKENS
+        return {"nyt_requests": self.max_query_nyt_requests, "llm_tokens": llm_tokens}
+
+    def run_cycle(self, force: bool = False) -> Dict:
+        """
+        Warm the top queries that need it, within the per-cycle budget.
+
+        Args:
+            force: Run even outside the off-peak window
+
+        Returns:
+            Summary of the cycle
+        """
+        summary = {"ran": False, "warmed": [], "fresh": 0, "failed": 0, "nyt_requests": 0, "llm_tokens": 0}
+        if not force and not self.is_off_peak():
+            return summary
+
+        summary["ran"] = True
+        self.totals["cycles"] += 1
+        self.cache.purge_expired()
+        self.query_log.compact(before=self.clock() - self.window)
+
+        for query, _ in self.rank_queries():
+            if not self.needs_warming(query):
+                summary["fresh"] += 1
+                continue
+
+            estimate = self._estimated_cost()
+            if (summary["nyt_requests"] + estimate["nyt_requests"] > self.max_nyt_requests
+                    or summary["llm_tokens"] + estimate["llm_tokens"] > self.max_llm_tokens):
+                print("💰 Warm budget reached, stopping cycle")
+                break
+
+            try:
+                cost = self._run_query(query)
+            except Exception as e:
+                print(f"❌ Warming failed for '{query}': {e}")
+                # Whatever it spent before failing still counts
+                nyt_requests = estimate["nyt_requests"]
+                llm_tokens = estimate["llm_tokens"]
+                summary["failed"] += 1
+                self.totals["failed"] += 1
+            else:
+                nyt_requests = cost.get("nyt_requests", 0)
+                llm_tokens = cost.get("input_tokens", 0) + cost.get("output_tokens", 0)
+                summary["warmed"].append(query)
+                self.totals["warmed"] += 1
+
+            summary["nyt_requests"] += nyt_requests
+            summary["llm_tokens"] += llm_tokens
+            self.totals["nyt_requests"] += nyt_requests
+            self.totals["llm_tokens"] += llm_tokens
+
+        return summary
+
+    def stats(self) -> Dict:
+        """
+        Cache effectiveness over the log window and cumulative warming cost.
+
+        warm_hit_ratio is the share of logged user queries that were served
+        from a report the warmer precomputed.
+        """
+        entries = self.query_log.entries(since=self.clock() - self.window)
+        total = len(entries)
+        warm_hits = sum(1 for entry in entries if entry["outcome"] == OUTCOME_WARM_HIT)
+        hits = sum(1 for entry in entries if entry["outcome"] == OUTCOME_HIT)
+        return {
+            "queries": total,
+            "hit_ratio": (hits + warm_hits) / total if total else 0.0,
+            "warm_hit_ratio": warm_hits / total if total else 0.0,
+            **self.totals,
+        }
+
+    def run_forever(self, interval: float = 900.0, force: bool = False, max_cycles: int = None) -> None:
+        """Run cycles every interval seconds."""
+        cycles = 0
+        while max_cycles is None or cycles < max_cycles:
+            summary = self.run_cycle(force=force)
+            if summary["ran"]:
+                print(
+                    f"🔥 Warmed {len(summary['warmed'])} queries "
+                    f"({summary['fresh']} already fresh, {summary['failed']} failed), "
+                    f"{summary['nyt_requests']} NY Times requests, {summary['llm_tokens']} LLM tokens"
+                )
+                print(f"📈 {self.stats()}")
+            cycles += 1
+            if max_cycles is None or cycles < max_cycles:
+                self.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute reports for trending queries")
+    parser.add_argument("--once", action="store_true", help="Run a single cycle and exit")
+    parser.add_argument("--force", action="store_true", help="Ignore the off-peak window")
+    parser.add_argument("--interval", type=float, default=900.0, help="Seconds between cycles")
+    args = parser.parse_args()
+
+    warmer = CacheWarmer()
+    if warmer.cache is None:
+        print("⚠️  Result cache is disabled (RESULT_CACHE=false or CASSETTE_MODE set); nothing to warm")
+        return
+    warmer.run_forever(interval=args.interval, force=args.force, max_cycles=1 if args.once else None)
+
+
+if __name__ == "__main__":
+    main()